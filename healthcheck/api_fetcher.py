@@ -1,5 +1,16 @@
+import hashlib
+import json
+import re
+import time
+
+from healthcheck.cache_service import CacheClient
 from healthcheck.common_funcs import http_get
+from healthcheck.interval_stats import IntervalStats
 from healthcheck.printer_funcs import print_msg, print_success, print_error
+from healthcheck.trace_recorder import TraceRecorder
+
+# time to live of cached topics in seconds, other topics are fetched again in each watch cycle
+TTLS = [(r'^license$', 3600), (r'^cluster$', 3600), (r'^nodes/\d+$', 600)]
 
 
 class ApiFetcher(object):
@@ -16,6 +27,9 @@ class ApiFetcher(object):
         self.username = _config['api']['user']
         self.password = _config['api']['pass']
         self.cache = {}
+        self.cached_at = {}
+        self.digests = {}
+        self.cache_client = CacheClient.inst(_config)
         self.uids = {}
         self.connected = None
 
@@ -49,6 +63,17 @@ class ApiFetcher(object):
             self.connected = False
         print_msg('')
 
+    def expire(self):
+        """
+        Expire cached topics after their time to live, see `TTLS`.
+        """
+        now = time.time()
+        for topic, cached_at in list(self.cached_at.items()):
+            if now - cached_at >= next((ttl for pattern, ttl in TTLS if re.search(pattern, topic)), 0):
+                del self.cache[topic]
+                del self.cached_at[topic]
+                self.digests.pop(topic, None)
+
     def get_uid(self, _internal_addr):
         """
         Get UID of node.
@@ -70,6 +95,19 @@ class ApiFetcher(object):
         """
         return self._fetch(_topic)
 
+    def get_digest(self, _topic):
+        """
+        Get the digest of a topic, calculated once per fetch.
+
+        :param _topic: The topic, e.g. 'nodes'
+        :return: The SHA-256 hex digest of the topic.
+        """
+        rsp = self._fetch(_topic)
+        if _topic not in self.digests:
+            self.digests[_topic] = hashlib.sha256(json.dumps(rsp, sort_keys=True, default=str).encode()).hexdigest()
+
+        return self.digests[_topic]
+
     def get_with_value(self, _topic, _key, _value):
         """
         Get a topic with a given value.
@@ -128,6 +166,7 @@ class ApiFetcher(object):
         :return: The result dictionary.
         """
         if _topic in self.cache:
+            TraceRecorder.inst().instant('cache hit', 'api', topic=_topic)
             return self.cache[_topic]
         else:
             if ':' in self.addr:
@@ -135,6 +174,27 @@ class ApiFetcher(object):
             else:
                 url = 'https://{}:9443/v1/{}'.format(self.addr, _topic)
 
-            rsp = http_get(url, self.username, self.password)
+            # consult the cache service first, it holds the raw responses
+            ttl = next((ttl for pattern, ttl in TTLS if re.search(pattern, _topic)), None)
+            with TraceRecorder.inst().span(f'GET {_topic}', 'api', topic=_topic):
+                rsp = self.cache_client.fetch(f'api {self.addr} {_topic}',
+                                              lambda: http_get(url, self.username, self.password), ttl)
+            if re.search(r'(^|/)stats(/|$)', _topic):
+                rsp = self._to_columnar(rsp)
             self.cache[_topic] = rsp
+            self.cached_at[_topic] = time.time()
             return rsp
+
+    @staticmethod
+    def _to_columnar(_rsp):
+        """
+        Convert the intervals of a stats topic into interval statistics, dropping the interval dicts.
+
+        :param _rsp: The response of a stats topic, e.g. 'nodes/stats'.
+        :return: The response with interval statistics.
+        """
+        for stats in _rsp if type(_rsp) == list else [_rsp]:
+            if 'intervals' in stats:
+                stats['intervals'] = IntervalStats(stats['intervals'])
+
+        return _rsp
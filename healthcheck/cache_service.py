@@ -0,0 +1,234 @@
+import json
+import os
+import socket
+import socketserver
+import stat
+import threading
+import time
+
+from healthcheck.printer_funcs import print_msg, print_warning
+
+# a user-private directory, since cached responses contain credentials, e.g. 'authentication_redis_pass' of 'bdbs'
+SOCKET_PATH = '~/.healthcheck/cache.sock'
+TTL = 60
+# a lease expires after this amount of seconds, so the next waiting caller takes over from a stuck one
+LEASE_TIMEOUT = 30
+# callers fall back to direct fetches if the service did not reply within this amount of seconds
+CLIENT_TIMEOUT = LEASE_TIMEOUT + 5
+
+
+class CacheService(object):
+    """
+    Cache Service class.
+
+    Caches API responses and remote command responses for concurrent invocations on a unix socket.
+    Requests and replies are JSON lines, i.e. one JSON object per line:
+    - {"get": <key>} replies {"value": <value>} if cached, otherwise {"lease": true} and the caller has to put the value.
+      While another connection holds the lease of a key, the request blocks until the value is put (single-flight)
+      or the lease expired after `LEASE_TIMEOUT` seconds.
+    - {"put": <key>, "value": <value>, "ttl": <seconds>} stores the value and releases the lease, no reply.
+    - {"release": <key>} releases the lease without a value, e.g. on errors, no reply.
+    Leases of a closed connection are released, so the next waiting caller takes over.
+    """
+
+    def __init__(self, _path=SOCKET_PATH):
+        """
+        :param _path: The path of the unix socket, only accessible by the owner.
+        :raise Exception: If another cache service is running on the socket.
+        """
+        self.path = os.path.expanduser(_path)
+        self.entries = {}
+        # keys mapped to the deadlines of their leases
+        self.leases = {}
+        self.cond = threading.Condition()
+
+        service = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                leases = set()
+                try:
+                    for line in self.rfile:
+                        req = json.loads(line)
+                        if 'get' in req:
+                            rsp = service.get(req['get'])
+                            if 'lease' in rsp:
+                                leases.add(req['get'])
+                            self.wfile.write(json.dumps(rsp).encode() + b'\n')
+                            self.wfile.flush()
+                        elif 'put' in req:
+                            service.put(req['put'], req['value'], req['ttl'])
+                            leases.discard(req['put'])
+                        elif 'release' in req:
+                            service.release(req['release'])
+                            leases.discard(req['release'])
+                finally:
+                    for key in leases:
+                        service.release(key)
+
+        # remove a stale socket of a previous service
+        if os.path.exists(self.path):
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                    sock.connect(self.path)
+                raise Exception(f'cache service already running on {self.path}')
+            except ConnectionRefusedError:
+                os.remove(self.path)
+
+        os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+        # no access by other users, not even between bind and chmod
+        umask = os.umask(0o077)
+        try:
+            self.server = socketserver.ThreadingUnixStreamServer(self.path, Handler)
+        finally:
+            os.umask(umask)
+        os.chmod(self.path, 0o600)
+        self.server.daemon_threads = True
+
+    def get(self, _key):
+        """
+        Get a cached value or a lease to put it, blocks while another caller holds an unexpired lease.
+
+        :param _key: The key.
+        :return: A dict with either 'value' or 'lease'.
+        """
+        with self.cond:
+            while True:
+                now = time.time()
+                entry = self.entries.get(_key)
+                if entry and entry[0] > now:
+                    return {'value': entry[1]}
+                if self.leases.get(_key, 0) <= now:
+                    self.leases[_key] = now + LEASE_TIMEOUT
+                    return {'lease': True}
+                self.cond.wait(self.leases[_key] - now)
+
+    def put(self, _key, _value, _ttl):
+        """
+        Put a value and release its lease.
+
+        :param _key: The key.
+        :param _value: The value.
+        :param _ttl: The time to live in seconds.
+        """
+        with self.cond:
+            now = time.time()
+            # drop expired entries
+            for key in [k for k, v in self.entries.items() if v[0] <= now]:
+                del self.entries[key]
+            self.entries[_key] = (now + _ttl, _value)
+            self.leases.pop(_key, None)
+            self.cond.notify_all()
+
+    def release(self, _key):
+        """
+        Release a lease without a value.
+
+        :param _key: The key.
+        """
+        with self.cond:
+            self.leases.pop(_key, None)
+            self.cond.notify_all()
+
+    def serve(self):
+        """
+        Serve until interrupted.
+        """
+        print_msg(f'serving cache on {self.path}')
+        try:
+            self.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.server.server_close()
+            os.remove(self.path)
+
+
+class CacheClient(object):
+    """
+    Cache Client class.
+
+    Consults the cache service configured in the [cache] section, falls back to direct fetches if it is unavailable,
+    does not reply within `CLIENT_TIMEOUT` seconds or its socket is not owned by the current user or accessible by
+    others.
+    """
+    _instance = None
+
+    def __init__(self, _config):
+        """
+        :param _config: The parsed configuration.
+        """
+        self.path = None
+        self.ttl = TTL
+        if 'cache' in _config:
+            self.path = os.path.expanduser(_config['cache'].get('socket', SOCKET_PATH))
+            self.ttl = float(_config['cache'].get('ttl', str(TTL)))
+        self.warned = False
+
+    @classmethod
+    def inst(cls, _config):
+        """
+        Get singleton instance.
+
+        :param _config: The parsed configuration.
+        :return: The CacheClient singleton.
+        """
+        if not cls._instance:
+            cls._instance = CacheClient(_config)
+
+        return cls._instance
+
+    def fetch(self, _key, _func, _ttl=None):
+        """
+        Fetch a value from the cache service, or by calling a function if it is not cached yet.
+
+        :param _key: The key.
+        :param _func: A function returning a JSON serializable value.
+        :param _ttl: An optional time to live in seconds, defaults to the configured one.
+        :return: The value.
+        :raise Exception: If an error occurred.
+        """
+        if not self.path:
+            return _func()
+
+        try:
+            # never send responses to, or trust responses of, a socket another user may have created
+            st = os.stat(self.path)
+            if not stat.S_ISSOCK(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+                raise PermissionError(0, 'socket not owned by the current user or accessible by others')
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(self.path)
+            # after connecting, unix sockets with a timeout fail with EAGAIN instead of waiting for the backlog
+            sock.settimeout(CLIENT_TIMEOUT)
+        except OSError as e:
+            if not self.warned:
+                print_warning(f'could not connect to cache service on {self.path}: {e.strerror}')
+                self.warned = True
+            return _func()
+
+        with sock, sock.makefile('rwb') as file:
+            try:
+                file.write(json.dumps({'get': _key}).encode() + b'\n')
+                file.flush()
+                line = file.readline()
+            except socket.timeout:
+                # the service is stuck, closing the connection releases a lease granted later on
+                line = None
+            if not line:
+                return _func()
+
+            rsp = json.loads(line)
+            if 'value' in rsp:
+                return rsp['value']
+
+            try:
+                value = _func()
+            except Exception:
+                file.write(json.dumps({'release': _key}).encode() + b'\n')
+                file.flush()
+                raise
+
+            file.write(json.dumps({'put': _key, 'value': value, 'ttl': _ttl or self.ttl}).encode() + b'\n')
+            file.flush()
+
+            return value
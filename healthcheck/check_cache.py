@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import sqlite3
+
+from threading import Lock
+
+from healthcheck.trace_recorder import TraceRecorder
+
+CACHE_PATH = '~/.healthcheck/checks.db'
+
+
+def _encode(_result):
+    """
+    Encode a result into JSON serializable values.
+
+    :param _result: The result, i.e. a tuple (status, info[, desc]) or a list of them.
+    :return: A list of results as lists, the status `Exception` as 'Exception'.
+    """
+    results = _result if type(_result) == list else [_result]
+
+    return {'multiple': type(_result) == list,
+            'results': [['Exception' if r[0] is Exception else r[0]] + list(r[1:]) for r in results]}
+
+
+def _decode(_encoded):
+    """
+    Decode a result, see `_encode`.
+
+    :param _encoded: The encoded result.
+    :return: The result.
+    """
+    results = [tuple([Exception if r[0] == 'Exception' else r[0]] + r[1:]) for r in _encoded['results']]
+
+    return results if _encoded['multiple'] else results[0]
+
+
+class CheckCache(object):
+    """
+    Check Cache class.
+
+    Keeps the results of checks which declare their input topics, see `inputs`, across runs.
+    A stored result is reused as long as the fingerprint of the fetched inputs and parameters is unchanged.
+    Results are kept as JSON in a SQLite database, i.e. the cache can be shared by concurrent invocations and fleet
+    workers, only accessible by the owner.
+    """
+    _instance = None
+
+    def __init__(self, _path=CACHE_PATH):
+        """
+        :param _path: The path of the database file, defaults to '~/.healthcheck/checks.db'.
+        """
+        self.path = os.path.expanduser(_path)
+        self.lock = Lock()
+        self.conn = None
+        self.reused = set()
+
+    @classmethod
+    def inst(cls):
+        """
+        Get singleton instance.
+
+        :return: The CheckCache singleton.
+        """
+        if not cls._instance:
+            cls._instance = CheckCache()
+
+        return cls._instance
+
+    def enable(self):
+        """
+        Enable caching of check results.
+        """
+        os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+        # results contain configuration values, no access by other users
+        umask = os.umask(0o077)
+        try:
+            # autocommit, each result is written in its own transaction
+            self.conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            self.conn.execute('CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, fingerprint TEXT, result TEXT)')
+        finally:
+            os.umask(umask)
+
+    def is_reused(self, _check):
+        """
+        Check if the last result of a check was reused.
+
+        :param _check: The check function.
+        :return: Boolean
+        """
+        return _check in self.reused
+
+    def execute(self, _check, _params):
+        """
+        Execute a check, or reuse its stored result if its inputs are unchanged.
+
+        :param _check: The check function, decorated with `inputs`.
+        :param _params: The parameters of the check.
+        :return: The result of the check.
+        """
+        if self.conn is None or not hasattr(_check, 'inputs'):
+            return _check(_params)
+
+        # the digests of the topics are calculated once per fetch and shared by all checks
+        api = _check.__self__.api()
+        digests = [api.get_digest(topic) for topic in _check.inputs]
+        fingerprint = hashlib.sha256(json.dumps([_params, digests], sort_keys=True, default=str).encode()).hexdigest()
+        key = f'{api.addr} {_check.__qualname__}'
+
+        with self.lock:
+            row = self.conn.execute('SELECT fingerprint, result FROM results WHERE key = ?', (key,)).fetchone()
+        if row and row[0] == fingerprint:
+            TraceRecorder.inst().instant('cache hit', 'check', check=_check.__name__)
+            self.reused.add(_check)
+            return _decode(json.loads(row[1]))
+
+        self.reused.discard(_check)
+        result = _check(_params)
+        with self.lock:
+            self.conn.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?)',
+                              (key, fingerprint, json.dumps(_encode(result), default=str)))
+
+        return result
+
+    def close(self):
+        """
+        Close the database file.
+        """
+        if self.conn is not None:
+            with self.lock:
+                self.conn.close()
+                self.conn = None
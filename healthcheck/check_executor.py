@@ -1,5 +1,11 @@
 import concurrent.futures
 import functools
+import time
+
+from healthcheck.check_cache import CheckCache
+from healthcheck.check_registry import get_meta
+from healthcheck.profile_recorder import ProfileRecorder
+from healthcheck.trace_recorder import TraceRecorder
 
 
 class CheckExecutor(object):
@@ -9,11 +15,12 @@ class CheckExecutor(object):
 
     def __init__(self, _result_cb, _max_workers=10):
         """
-        :param _result_cb: A callback executed when the results are available.
+        :param _result_cb: A callback executed when the results are available, with result, function and duration.
         :param _max_workers: Amount of worker threads for the pool.
         """
         self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=_max_workers)
         self.futures = []
+        self.durations = {}
         self.result_cb = _result_cb
 
     def execute(self, _func, _params=None, _done_cb=None):
@@ -25,10 +32,15 @@ class CheckExecutor(object):
         :param _done_cb: An optional callback executed when the execution is done.
         """
         def error_handler(_check, _params):
-            try:
-                return _check(_params)
-            except Exception as e:
-                return Exception, {e.__class__.__name__: str(e)}
+            code = get_meta(_check).code
+            with TraceRecorder.inst().span(code, 'check', check=_check.__name__), ProfileRecorder.inst().profile(code):
+                start = time.time()
+                try:
+                    return CheckCache.inst().execute(_check, _params)
+                except Exception as e:
+                    return Exception, {e.__class__.__name__: str(e)}
+                finally:
+                    self.durations[_check] = time.time() - start
 
         future = self.executor.submit(functools.partial(error_handler, _func), _params)
         future.func = _func
@@ -42,7 +54,7 @@ class CheckExecutor(object):
         Wait for completition of all futures.
         """
         for future in concurrent.futures.as_completed(self.futures):
-            self.result_cb(future.result(), future.func)
+            self.result_cb(future.result(), future.func, self.durations.get(future.func))
 
         self.futures = []
 
@@ -0,0 +1,194 @@
+import ast
+import glob
+import importlib
+import json
+import os
+import re
+
+from collections import namedtuple
+
+from healthcheck.common_funcs import write_atomic
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+SUITES_DIR = os.path.join(PACKAGE_DIR, 'check_suites')
+PARAMETER_MAPS_DIR = os.path.join(os.path.dirname(PACKAGE_DIR), 'parameter_maps')
+MANIFEST_PATH = '~/.healthcheck/manifest.json'
+# version of the manifest entries, to be increased on each change of `CheckRegistry._parse`
+MANIFEST_VERSION = 1
+# syslog severity of failures by check category, i.e. error for status checks, warning for config and usage checks
+SEVERITIES = {'S': 3, 'C': 4, 'U': 4}
+
+CheckMeta = namedtuple('CheckMeta', ['code', 'title', 'remedy', 'severity'])
+
+
+def to_meta(_code, _doc, _remedy):
+    """
+    Create check metadata.
+
+    :param _code: The check code, e.g. 'NC-001'.
+    :param _doc: The docstring of the check.
+    :param _remedy: The remedy or None.
+    :return: The check metadata.
+    """
+    return CheckMeta(_code, _doc.split('\n')[0], _remedy, SEVERITIES.get(_code[1:2], 3))
+
+
+def get_meta(_func):
+    """
+    Get the metadata of a check, attached by `CheckRegistry.load_suite` or parsed from its docstring otherwise.
+
+    :param _func: The check function.
+    :return: The check metadata.
+    """
+    meta = getattr(_func, 'meta', None)
+    if meta:
+        return meta
+
+    remedy = re.findall(r'Remedy: (.*)', _func.__doc__, re.MULTILINE)
+    return to_meta(_func.__doc__.split(':')[0], _func.__doc__, remedy[0] if remedy else None)
+
+
+class CheckRegistry(object):
+    """
+    Check Registry class.
+
+    Holds a manifest of all check suites and checks, generated from the source files of the check suites without
+    importing them. The manifest is cached and only regenerated for changed source files, or entirely if it was
+    generated by another version, see `MANIFEST_VERSION`.
+    """
+    _instance = None
+
+    def __init__(self, _path=MANIFEST_PATH):
+        """
+        :param _path: The path of the cached manifest, defaults to '~/.healthcheck/manifest.json'.
+        """
+        self.path = os.path.expanduser(_path)
+        self.manifest = {}
+
+        if os.path.exists(self.path):
+            try:
+                with open(self.path) as file:
+                    cached = json.loads(file.read())
+                if cached.get('version') == MANIFEST_VERSION:
+                    self.manifest = cached['files']
+            except (AttributeError, KeyError, ValueError):
+                self.manifest = {}
+
+        files = sorted(glob.glob(os.path.join(SUITES_DIR, 'suite_*.py')))
+        stamps = {file: [os.stat(file).st_mtime_ns, os.stat(file).st_size] for file in files}
+        if {file: entry['stamp'] for file, entry in self.manifest.items()} != stamps:
+            self.manifest = {file: self.manifest[file] if file in self.manifest and
+                             self.manifest[file]['stamp'] == stamps[file] else self._parse(file, stamps[file])
+                             for file in files}
+            self._save()
+
+    @classmethod
+    def inst(cls):
+        """
+        Get singleton instance.
+
+        :return: The CheckRegistry singleton.
+        """
+        if not cls._instance:
+            cls._instance = CheckRegistry()
+
+        return cls._instance
+
+    def get_suites(self, _suite=None, _check=None):
+        """
+        Get suites of the manifest.
+
+        :param _suite: An optional suite name filter, e.g. 'node'.
+        :param _check: An optional CSV list of check filters, e.g. 'NC-001,status'.
+        :return: A list of suite dicts, each with a filtered list of check dicts with name, code, doc, remedy, API and
+        remote executor requirements and parameter map support.
+        """
+        suites = []
+        for entry in self.manifest.values():
+            for suite in entry['suites']:
+                if _suite and _suite.lower() not in suite['doc'].lower():
+                    continue
+                # parameter maps are looked up on each call, since they may be added without changing the suite
+                checks = [dict(check, params=bool(glob.glob(os.path.join(PARAMETER_MAPS_DIR, suite['name'].lower(),
+                                                                          check['name'], '*.json'))))
+                          for check in suite['checks'] if not _check or self._matches(check, _check)]
+                suites.append(dict(suite, checks=checks))
+
+        return sorted(suites, key=lambda x: x['name'])
+
+    @staticmethod
+    def load_suite(_suite, _config):
+        """
+        Import the module of a suite and instantiate it, the metadata of its checks is attached as `meta`.
+
+        :param _suite: A suite dict of the manifest.
+        :param _config: The parsed configuration.
+        :return: The check suite.
+        """
+        cls = getattr(importlib.import_module(_suite['module']), _suite['name'])
+        for check in _suite['checks']:
+            getattr(cls, check['name']).meta = to_meta(check['code'], check['doc'], check['remedy'])
+
+        return cls(_config)
+
+    @staticmethod
+    def _matches(_check, _filter):
+        """
+        Match a check against a CSV list of check filters.
+
+        :param _check: A check dict of the manifest.
+        :param _filter: A CSV list of check filters, matched against the function name and the description.
+        :return: Boolean
+        """
+        check_doc = _check['doc'].split('\n')[0].lower()
+        check_args = map(lambda x: x.strip(), _filter.lower().split(','))
+
+        return any(map(lambda x: x in _check['name'] or x in check_doc, check_args))
+
+    @staticmethod
+    def _parse(_file, _stamp):
+        """
+        Parse a suite source file.
+
+        :param _file: The path of the source file.
+        :param _stamp: The modification time and size of the source file.
+        :return: The manifest entry of the source file.
+        """
+        with open(_file) as file:
+            tree = ast.parse(file.read(), _file)
+
+        module = 'healthcheck.check_suites.' + os.path.basename(_file)[:-3]
+        suites = []
+        for node in filter(lambda x: isinstance(x, ast.ClassDef), tree.body):
+            if 'BaseCheckSuite' not in [getattr(base, 'id', getattr(base, 'attr', None)) for base in node.bases]:
+                continue
+
+            checks = []
+            for func in filter(lambda x: isinstance(x, ast.FunctionDef) and x.name.startswith('check_'), node.body):
+                doc = ast.get_docstring(func, clean=False) or ''
+                remedy = re.findall(r'Remedy: (.*)', doc, re.MULTILINE)
+                # names used by the check, like `co_names` and `co_varnames` of its code object
+                names = set([x.id for x in ast.walk(func) if isinstance(x, ast.Name)] +
+                            [x.attr for x in ast.walk(func) if isinstance(x, ast.Attribute)])
+                checks.append({
+                    'name': func.name,
+                    'code': doc.split(':')[0],
+                    'doc': doc,
+                    'remedy': remedy[0] if remedy else None,
+                    'api': 'api' in names,
+                    'rex': 'rex' in names
+                })
+
+            suites.append({'name': node.name, 'module': module, 'doc': ast.get_docstring(node, clean=False) or '',
+                           'checks': sorted(checks, key=lambda x: x['name'])})
+
+        return {'stamp': _stamp, 'suites': suites}
+
+    def _save(self):
+        """
+        Write the cached manifest atomically, errors are ignored since the manifest can be regenerated.
+        """
+        try:
+            write_atomic(self.path, json.dumps({'version': MANIFEST_VERSION, 'files': self.manifest}))
+        except OSError:
+            pass
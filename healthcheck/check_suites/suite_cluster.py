@@ -1,7 +1,7 @@
 import re
 
 from healthcheck.check_suites.base_suite import BaseCheckSuite
-from healthcheck.common_funcs import calc_usage, GB, to_gb, to_kops, to_percent
+from healthcheck.common_funcs import GB, inputs, to_gb, to_kops, to_percent
 
 
 class Cluster(BaseCheckSuite):
@@ -85,6 +85,7 @@ class Cluster(BaseCheckSuite):
 
         return None, info
 
+    @inputs('license', 'shards')
     def check_cluster_config_004(self, _params):
         """CC-004: Check license.
 
@@ -204,7 +205,7 @@ class Cluster(BaseCheckSuite):
         info = {}
         stats = self.api().get('cluster/stats')
 
-        minimum, average, maximum, std_dev = calc_usage(stats['intervals'], 'total_req')
+        minimum, average, maximum, std_dev = stats['intervals'].usage('total_req')
 
         info['min'] = '{} Kops'.format(to_kops(minimum))
         info['avg'] = '{} Kops'.format(to_kops(average))
@@ -224,7 +225,7 @@ class Cluster(BaseCheckSuite):
         info = {}
         stats = self.api().get('cluster/stats')
 
-        minimum, average, maximum, std_dev = calc_usage(stats['intervals'], 'free_memory')
+        minimum, average, maximum, std_dev = stats['intervals'].usage('free_memory')
 
         total_mem = self.api().get_sum_of_values('nodes', 'total_memory')
 
@@ -247,7 +248,7 @@ class Cluster(BaseCheckSuite):
         info = {}
         stats = self.api().get('cluster/stats')
 
-        minimum, average, maximum, std_dev = calc_usage(stats['intervals'], 'ephemeral_storage_avail')
+        minimum, average, maximum, std_dev = stats['intervals'].usage('ephemeral_storage_avail')
 
         total_size = self.api().get_sum_of_values(f'nodes', 'ephemeral_storage_size')
 
@@ -270,7 +271,7 @@ class Cluster(BaseCheckSuite):
         info = {}
         stats = self.api().get('cluster/stats')
 
-        minimum, average, maximum, std_dev = calc_usage(stats['intervals'], 'persistent_storage_avail')
+        minimum, average, maximum, std_dev = stats['intervals'].usage('persistent_storage_avail')
 
         total_size = self.api().get_sum_of_values(f'nodes', 'persistent_storage_size')
 
@@ -292,14 +293,14 @@ class Cluster(BaseCheckSuite):
         info = {}
         stats = self.api().get('cluster/stats')
 
-        minimum, average, maximum, std_dev = calc_usage(stats['intervals'], 'ingress_bytes')
+        minimum, average, maximum, std_dev = stats['intervals'].usage('ingress_bytes')
         info['ingress'] = {
             'min': '{} GB/s'.format(to_gb(minimum)),
             'avg': '{} GB/s'.format(to_gb(average)),
             'max': '{} GB/s'.format(to_gb(maximum)),
             'dev': '{} GB/s'.format(to_gb(std_dev)),
         }
-        minimum, average, maximum, std_dev = calc_usage(stats['intervals'], 'egress_bytes')
+        minimum, average, maximum, std_dev = stats['intervals'].usage('egress_bytes')
         info['egress'] = {
             'min': '{} GB/s'.format(to_gb(minimum)),
             'avg': '{} GB/s'.format(to_gb(average)),
@@ -1,5 +1,12 @@
+import heapq
+import re
+import statistics
+
+from concurrent.futures import ThreadPoolExecutor
+
 from healthcheck.check_suites.base_suite import BaseCheckSuite
-from healthcheck.common_funcs import calc_usage, GB, to_gb, to_kops, redis_ping
+from healthcheck.common_funcs import GB, inputs, parse_info, parse_latency_latest, parse_slowlog, to_forecast, to_gb, \
+    to_kops, to_ms, to_remote_script, redis_latency, redis_ping_all
 
 
 class Databases(BaseCheckSuite):
@@ -7,6 +14,85 @@ class Databases(BaseCheckSuite):
     Check configuration, status and usage of all databases.
     """
 
+    @staticmethod
+    def _get_endpoint(_bdb):
+        """
+        Get the external endpoint of a database.
+
+        :param _bdb: The database.
+        :return: The endpoint dict.
+        """
+        endpoints = _bdb['endpoints']
+        if len(endpoints) > 1:
+            return list(filter(lambda x: x['addr_type'] == 'external', endpoints))[0]
+
+        return endpoints[0]
+
+    def _get_shards_per_target(self):
+        """
+        Get the shards of each node.
+
+        :return: A dict mapping targets to lists of shards, targets without shards are omitted.
+        """
+        shards = self.api().get('shards')
+        shards_per_target = {}
+        for target, addr in self.rex().get_addrs().items():
+            node_uid = str(self.api().get_uid(addr))
+            node_shards = list(filter(lambda x: str(x['node_uid']) == node_uid, shards))
+            if node_shards:
+                shards_per_target[target] = node_shards
+
+        return shards_per_target
+
+    def _get_shard_stats(self):
+        """
+        Get the stats of all shards with one API call.
+
+        :return: A dict mapping shard UIDs to shard stats.
+        """
+        return {str(stats['uid']): stats for stats in self.api().get('shards/stats')}
+
+    def _get_shard_names(self):
+        """
+        Get the names of all shards, including the name of their database.
+
+        :return: A tuple of dicts mapping shard UIDs to names, e.g. 'shard:1 (db1)', and to database names.
+        """
+        bdb_names = {bdb['uid']: bdb['name'] for bdb in self.api().get('bdbs')}
+        shard_bdbs = {str(shard['uid']): bdb_names.get(shard['bdb_uid'], '?') for shard in self.api().get('shards')}
+
+        return {uid: f'shard:{uid} ({name})' for uid, name in shard_bdbs.items()}, shard_bdbs
+
+    def _exec_shard_cli(self, _cmds):
+        """
+        Execute `shard-cli` commands for all shards, batched into one remote invocation per node.
+
+        :param _cmds: A list of commands, e.g. ['INFO all'].
+        :return: A dict mapping shard UIDs to dicts mapping commands to outputs, None if the command failed.
+        """
+        cmd_targets = []
+        for target, shards in self._get_shards_per_target().items():
+            cmds = []
+            for shard in shards:
+                for cmd in _cmds:
+                    cmds.append(f'echo ==shard:{shard["uid"]}:{cmd}==')
+                    # mark failures, the next command is executed nevertheless
+                    cmds.append(f'sudo /opt/redislabs/bin/shard-cli {shard["uid"]} {cmd} || echo ==failed==')
+            cmd_targets.append((to_remote_script(cmds), target))
+
+        if not cmd_targets:
+            return {}
+
+        outputs = {}
+        for future in self.rex().exec_multi(cmd_targets, _cacheable=False):
+            parts = re.split(r'^==shard:(\w+):(.+)==$\n?', future.result(), flags=re.MULTILINE)
+            for uid, cmd, output in zip(parts[1::3], parts[2::3], parts[3::3]):
+                output = output.strip()
+                outputs.setdefault(uid, {})[cmd] = None if '==failed==' in output.splitlines() else output
+
+        return outputs
+
+    @inputs('bdbs')
     def check_databases_config_001(self, _params):
         """DC-001: Check database configuration.
 
@@ -48,28 +134,44 @@ class Databases(BaseCheckSuite):
     def check_databases_config_002(self, _params):
         """DC-002: Check database endpoints.
 
-        Calls '/v1/bdbs' from API and sends a Redis PING to each endpoint and compares the response to 'PONG'.
+        Calls '/v1/bdbs' from API and sends a Redis PING without AUTH to each endpoint concurrently and compares the
+        response to 'PONG' or 'NOAUTH'. Outputs connect and PING round-trip times of each endpoint.
+        By default only the external endpoint of each database is checked.
 
         Remedy: Investigate the network connection to the endpoint.
 
-        :param _params: None
+        :param _params: An optional dict with 'timeout' in seconds, 'max_connections' and 'all_endpoints'.
         :returns: result
         """
         bdbs = self.api().get('bdbs')
-        info = {}
+        timeout = _params.get('timeout', 5.0) if _params else 5.0
+        max_connections = _params.get('max_connections', 64) if _params else 64
+        all_endpoints = _params.get('all_endpoints', False) if _params else False
 
+        names = {}
         for bdb in bdbs:
             endpoints = bdb['endpoints']
-            if len(endpoints) > 1:
-                endpoint = list(filter(lambda x: x['addr_type'] == 'external', endpoints))[0]
-            else:
-                endpoint = endpoints[0]
+            if all_endpoints:
+                for endpoint in endpoints:
+                    for addr in endpoint['addr']:
+                        names[(addr, endpoint['port'])] = f"{endpoint['dns_name']} ({addr})"
+                continue
+
+            endpoint = self._get_endpoint(bdb)
+            names[(endpoint['addr'][0], endpoint['port'])] = endpoint['dns_name']
 
-            result = redis_ping(endpoint['addr'][0], endpoint['port'])
-            info[endpoint['dns_name']] = result
+        # a plain PING without AUTH, a 'NOAUTH' reply proves the endpoint is reachable
+        info = {}
+        results = redis_ping_all([(addr, port, None) for addr, port in names], timeout, max_connections)
+        for (addr, port), name in names.items():
+            result, connect_time, ping_time = results[(addr, port)]
+            info[name] = {'PING': result,
+                          'connect': f'{to_ms(connect_time * 1000)} ms' if connect_time is not None else '-',
+                          'rtt': f'{to_ms(ping_time * 1000)} ms' if ping_time is not None else '-'}
 
-        return all(map(lambda x: x is True, info.values())) if info else '', info
+        return all(map(lambda x: x['PING'] is True, info.values())) if info else '', info
 
+    @inputs('bdbs')
     def check_databases_config_003(self, _params):
         """DC-003: Check for OSS cluster API of each database.
 
@@ -88,6 +190,7 @@ class Databases(BaseCheckSuite):
 
         return all(info.values()) if info.values() else '', info
 
+    @inputs('bdbs', 'nodes', 'shards')
     def check_databases_config_004(self, _params):
         """DC-004: Check for dense shards placement of each database.
 
@@ -125,6 +228,7 @@ class Databases(BaseCheckSuite):
 
         return not any(info.values()), info
 
+    @inputs('bdbs')
     def check_database_config_005(self, _params):
         """DC-005: Get database modules.
 
@@ -217,8 +321,9 @@ class Databases(BaseCheckSuite):
     def check_databases_usage_001(self, _params):
         """DU-001: Check throughput of each database (min/avg/max/dev).
 
-        Calls '/v1/bdbs' from API and calculates min/avg/max/dev for 'total_req' of each shard.
+        Calls '/v1/bdbs' and '/v1/shards/stats' from API and calculates min/avg/max/dev for 'total_req' of each shard.
         It compares the maximum value to Redis Labs recommended upper limitsi, i.e. 25 Kops.
+        Shards without stats are listed, the result of their database is no result then unless a limit is exceeded.
 
         Remedy: Add more shards or investigate the key distribution.
 
@@ -226,21 +331,28 @@ class Databases(BaseCheckSuite):
         :returns: result
         """
         bdbs = self.api().get('bdbs')
+        shard_stats = self._get_shard_stats()
         info = {}
         results = {}
+        missing = set()
 
         for bdb in bdbs:
+            results[bdb['name']] = False
             db_stats = self.api().get(f'bdbs/stats/{bdb["uid"]}')
 
-            minimum, average, maximum, std_dev = calc_usage(db_stats['intervals'], 'total_req')
+            minimum, average, maximum, std_dev = db_stats['intervals'].usage('total_req')
             info[bdb['name']] = {
                 'total': '{}/{}/{}/{} Kops'.format(to_kops(minimum), to_kops(average), to_kops(maximum),
                                                    to_kops(std_dev))}
 
             for shard_uid in bdb['shard_list']:
-                shard_stats = self.api().get(f'shards/stats/{shard_uid}')
+                stats = shard_stats.get(str(shard_uid))
+                if stats is None:
+                    missing.add(bdb['name'])
+                    info[bdb['name']][f'shard:{shard_uid}'] = 'no stats'
+                    continue
 
-                minimum, average, maximum, std_dev = calc_usage(shard_stats['intervals'], 'total_req')
+                minimum, average, maximum, std_dev = stats['intervals'].usage('total_req')
 
                 if bdb['bigstore']:
                     result = maximum > 5000
@@ -248,19 +360,20 @@ class Databases(BaseCheckSuite):
                     result = maximum > 17500
                 else:
                     result = maximum > 25000
-                results[bdb['name']] = result
+                results[bdb['name']] = results[bdb['name']] or result
 
-                info[bdb['name']][f'shard:{shard_uid} ({shard_stats["role"]})'] = \
+                info[bdb['name']][f'shard:{shard_uid} ({stats["role"]})'] = \
                     '{}/{}/{}/{} Kops'.format(to_kops(minimum), to_kops(average), to_kops(maximum), to_kops(std_dev))
 
-        return [(not results[bdb['name']], info[bdb['name']],
+        return [(False if results[bdb['name']] else None if bdb['name'] in missing else True, info[bdb['name']],
                  f"DU-001: Check throughput of '{bdb['name']}' (min/avg/max/dev).") for bdb in bdbs]
 
     def check_databases_usage_002(self, _params):
         """DU-002: Check memory usage of each database (min/avg/max/dev).
 
-        Calls '/v1/bdbs' from API and calculates min/avg/max/dev for 'used_memory' of each shard.
+        Calls '/v1/bdbs' and '/v1/shards/stats' from API and calculates min/avg/max/dev for 'used_memory' of each shard.
         It compares the maximum value to Redis Labs recommended upper limits, i.e. 25 GB.
+        Shards without stats are listed, the result of their database is no result then unless a limit is exceeded.
 
         Remedy: Add more shards or investigate the key distribution.
 
@@ -268,32 +381,39 @@ class Databases(BaseCheckSuite):
         :returns: result
         """
         bdbs = self.api().get('bdbs')
+        shard_stats = self._get_shard_stats()
         info = {}
         results = {}
+        missing = set()
 
         for bdb in bdbs:
+            results[bdb['name']] = False
             db_stats = self.api().get(f'bdbs/stats/{bdb["uid"]}')
 
-            minimum, average, maximum, std_dev = calc_usage(db_stats['intervals'], 'used_memory')
+            minimum, average, maximum, std_dev = db_stats['intervals'].usage('used_memory')
             info[bdb['name']] = {
                 'total': '{}/{}/{}/{} GB'.format(to_gb(minimum), to_gb(average), to_gb(maximum),
                                                  to_gb(std_dev))}
 
             for shard_uid in bdb['shard_list']:
-                shard_stats = self.api().get(f'shards/stats/{shard_uid}')
+                stats = shard_stats.get(str(shard_uid))
+                if stats is None:
+                    missing.add(bdb['name'])
+                    info[bdb['name']][f'shard:{shard_uid}'] = 'no stats'
+                    continue
 
-                minimum, average, maximum, std_dev = calc_usage(shard_stats['intervals'], 'used_memory')
+                minimum, average, maximum, std_dev = stats['intervals'].usage('used_memory')
 
                 if bdb['bigstore']:
                     result = maximum > (50 * GB)
                 else:
                     result = maximum > (25 * GB)
-                results[bdb['name']] = result
+                results[bdb['name']] = results[bdb['name']] or result
 
-                info[bdb['name']][f'shard:{shard_uid} ({shard_stats["role"]})'] = \
+                info[bdb['name']][f'shard:{shard_uid} ({stats["role"]})'] = \
                     '{}/{}/{}/{} GB'.format(to_gb(minimum), to_gb(average), to_gb(maximum), to_gb(std_dev))
 
-        return [(not results[bdb['name']], info[bdb['name']],
+        return [(False if results[bdb['name']] else None if bdb['name'] in missing else True, info[bdb['name']],
                  f"DU-002: Check memory usage of '{bdb['name']}' (min/avg/max/dev).") for bdb in bdbs]
 
     def check_databases_usage_003(self, _params):
@@ -310,11 +430,275 @@ class Databases(BaseCheckSuite):
         for bdb in bdbs:
             db_stats = self.api().get(f'bdbs/stats/{bdb["uid"]}')
 
-            minimum, average, maximum, std_dev = calc_usage(db_stats['intervals'], 'ingress_bytes')
+            minimum, average, maximum, std_dev = db_stats['intervals'].usage('ingress_bytes')
             info[bdb['name']] = {
                 'ingress': '{}/{}/{}/{} GB/s'.format(to_gb(minimum), to_gb(average), to_gb(maximum), to_gb(std_dev))
             }
-            minimum, average, maximum, std_dev = calc_usage(db_stats['intervals'], 'egress_bytes')
+            minimum, average, maximum, std_dev = db_stats['intervals'].usage('egress_bytes')
             info[bdb['name']]['egress'] = '{}/{}/{}/{} GB/s'.format(to_gb(minimum), to_gb(average), to_gb(maximum), to_gb(std_dev))
 
         return None, info
+
+    def check_databases_usage_004(self, _params):
+        """DU-004: Check endpoint latency of each database (p50/p99/max).
+
+        Calls '/v1/bdbs' from API and sends a burst of PINGs to the external endpoint of each database,
+        one after another and pipelined. Calculates p50/p99/max latency and achieved ops/s.
+        If parameters are passed, compares p99 latency and pipelined ops/s to 'max_p99_ms' and 'min_ops'.
+
+        Remedy: Investigate the network connection to the endpoint and the load of the proxy.
+
+        :param _params: An optional dict with thresholds and burst sizes, see 'parameter_maps/databases/check_databases_usage_004' for examples.
+        :returns: result
+        """
+        bdbs = self.api().get('bdbs')
+        params = dict({'count': 100, 'pipeline': 100, 'timeout': 1.0, 'max_seconds': 2.0, 'max_workers': 8},
+                      **(_params or {}))
+
+        def measure(_bdb):
+            endpoint = self._get_endpoint(_bdb)
+            return redis_latency(endpoint['addr'][0], endpoint['port'], _bdb.get('authentication_redis_pass'),
+                                 params['count'], params['pipeline'], params['timeout'], params['max_seconds'])
+
+        results = []
+        with ThreadPoolExecutor(max_workers=max(min(params['max_workers'], len(bdbs)), 1)) as e:
+            for bdb, future in [(bdb, e.submit(measure, bdb)) for bdb in bdbs]:
+                desc = f"DU-004: Check endpoint latency of '{bdb['name']}' (p50/p99/max)."
+                try:
+                    latency = future.result()
+                except Exception as ex:
+                    results.append((Exception, {ex.__class__.__name__: str(ex)}, desc))
+                    continue
+
+                # no PING completed within 'max_seconds', e.g. due to a slow connect or 'count' of 0
+                if latency['p50'] is None:
+                    results.append((None, {'latency': 'n/a', 'ops/s': 'n/a',
+                                           'pipelined ops/s': round(latency['pipelined ops/s'] or 0)}, desc))
+                    continue
+
+                info = {'latency': '{}/{}/{} ms'.format(to_ms(latency['p50'] * 1000), to_ms(latency['p99'] * 1000),
+                                                        to_ms(latency['max'] * 1000)),
+                        'ops/s': round(latency['ops/s']),
+                        'pipelined ops/s': round(latency['pipelined ops/s'] or 0)}
+                if not _params:
+                    results.append((None, info, desc))
+                    continue
+
+                result = latency['p99'] * 1000 <= params.get('max_p99_ms', float('inf')) \
+                    and (latency['pipelined ops/s'] or 0) >= params.get('min_ops', 0)
+                results.append((result, info, desc))
+
+        return results
+
+    def check_databases_usage_005(self, _params):
+        """DU-005: Check memory fragmentation, evictions and command latency of each shard.
+
+        Executes `shard-cli <UID> INFO all` for every shard, batched into one remote invocation per node.
+        Outputs fragmentation ratio, evicted and expired keys and the command with the highest 'usec_per_call'.
+        If parameters are passed, compares them to 'max_fragmentation_ratio' (for shards using more than
+        'min_used_memory_GB'), 'max_evicted_keys', 'max_expired_keys' and 'max_usec_per_call'.
+        Shards without a parsable INFO are listed, the result is no result then unless another shard failed.
+
+        Remedy: Investigate the key distribution, the eviction policy and slow commands of the database.
+
+        :param _params: An optional dict with thresholds, see 'parameter_maps/databases/check_databases_usage_005' for examples.
+        :returns: result
+        """
+        rex = True  # Remote Executor called in subroutine
+        shard_names, _ = self._get_shard_names()
+        info = {}
+        unknown = []
+
+        for uid, outputs in sorted(self._exec_shard_cli(['INFO all']).items(), key=lambda x: int(x[0])):
+            name = shard_names.get(uid, f'shard:{uid}')
+            values = parse_info(outputs['INFO all'] or '')
+            if 'used_memory' not in values or 'mem_fragmentation_ratio' not in values:
+                unknown.append(name)
+                info[name] = 'shard-cli failed' if outputs['INFO all'] is None else 'no valid INFO'
+                continue
+
+            usecs = {k[len('cmdstat_'):]: float(v.get('usec_per_call', 0)) for k, v in values.items()
+                     if k.startswith('cmdstat_') and type(v) == dict}
+            slowest = max(usecs.items(), key=lambda x: x[1]) if usecs else (None, .0)
+            frag_ratio = float(values.get('mem_fragmentation_ratio', 0))
+            used_memory = int(values.get('used_memory', 0))
+            evicted_keys = int(values.get('evicted_keys', 0))
+            expired_keys = int(values.get('expired_keys', 0))
+
+            shard_info = {'fragmentation ratio': frag_ratio, 'evicted keys': evicted_keys,
+                          'expired keys': expired_keys,
+                          'slowest command': f'{slowest[0]} ({slowest[1]} usec/call)' if slowest[0] else None}
+
+            if not _params:
+                info[name] = shard_info
+                continue
+
+            if used_memory > _params.get('min_used_memory_GB', 0) * GB \
+                    and frag_ratio > _params.get('max_fragmentation_ratio', float('inf')) \
+                    or evicted_keys > _params.get('max_evicted_keys', float('inf')) \
+                    or expired_keys > _params.get('max_expired_keys', float('inf')) \
+                    or slowest[1] > _params.get('max_usec_per_call', float('inf')):
+                info[name] = shard_info
+
+        if not _params:
+            return None, info
+
+        if len(info) > len(unknown):
+            return False, info
+
+        return None if unknown else True, info if info else {'OK': 'all'}
+
+    def check_databases_usage_006(self, _params):
+        """DU-006: Check slow commands and latency spikes of all shards.
+
+        Executes `shard-cli <UID> --no-raw SLOWLOG GET <count>` and `shard-cli <UID> LATENCY LATEST` for every shard,
+        batched into one remote invocation per node.
+        Ranks the slowest commands and the worst latency spikes across all shards, keeping only the 'top' entries,
+        and counts slow commands per database.
+        If parameters are passed, compares them to 'max_duration_ms' and 'max_latency_ms'.
+        Shards whose `shard-cli` failed are listed, the result is no result then unless a threshold is exceeded.
+
+        Remedy: Avoid slow commands, e.g. KEYS or HGETALL of big hashes, and investigate the latency events.
+
+        :param _params: An optional dict with thresholds, see 'parameter_maps/databases/check_databases_usage_006' for examples.
+        :returns: result
+        """
+        rex = True  # Remote Executor called in subroutine
+        params = dict({'count': 128, 'top': 10}, **(_params or {}))
+        shard_names, shard_bdbs = self._get_shard_names()
+        slowlog_cmd, latency_cmd = f'--no-raw SLOWLOG GET {int(params["count"])}', 'LATENCY LATEST'
+
+        # bounded min-heaps of (duration, UID, entry)
+        commands = []
+        spikes = []
+        counts = {}
+        failed = []
+        for uid, outputs in self._exec_shard_cli([slowlog_cmd, latency_cmd]).items():
+            name = shard_names.get(uid, f'shard:{uid}')
+            bdb_name = shard_bdbs.get(uid, '?')
+            if outputs.get(slowlog_cmd) is None or outputs.get(latency_cmd) is None:
+                failed.append(name)
+                continue
+
+            for _, _, duration, command in parse_slowlog(outputs[slowlog_cmd]):
+                counts[bdb_name] = counts.get(bdb_name, 0) + 1
+                item = (duration, uid, f'{command} ({to_ms(duration / 1000)} ms) on {name}')
+                if len(commands) < params['top']:
+                    heapq.heappush(commands, item)
+                elif item > commands[0]:
+                    heapq.heapreplace(commands, item)
+
+            for event, _, _, maximum in parse_latency_latest(outputs[latency_cmd]):
+                item = (maximum, uid, f'{event} ({maximum} ms) on {name}')
+                if len(spikes) < params['top']:
+                    heapq.heappush(spikes, item)
+                elif item > spikes[0]:
+                    heapq.heapreplace(spikes, item)
+
+        commands.sort(reverse=True)
+        spikes.sort(reverse=True)
+        info = {'slowest commands': [x[2] for x in commands] or None,
+                'slow commands per database': dict(sorted(counts.items())) or None,
+                'worst latency spikes': [x[2] for x in spikes] or None}
+        if failed:
+            info['shard-cli failed'] = sorted(failed)
+
+        if not _params:
+            return None, info
+
+        result = not any(x[0] > params.get('max_duration_ms', float('inf')) * 1000 for x in commands) \
+            and not any(x[0] > params.get('max_latency_ms', float('inf')) for x in spikes)
+
+        return None if result and failed else result, info
+
+    def check_databases_usage_007(self, _params):
+        """DU-007: Check skew of throughput and memory usage across the master shards of each database.
+
+        Calls '/v1/shards' and '/v1/shards/stats' from API and calculates the max/median ratio and the coefficient of
+        variation of the average 'total_req' and 'used_memory' of the master shards of each database.
+        Shards above 'max_ratio' times the median are hot, nodes with at least 'min_hot_shards' hot shards are hot.
+        If parameters are passed, compares the ratios and coefficients of variation to 'max_ratio' and 'max_cv'.
+
+        Remedy: Investigate the key distribution, e.g. big or hot keys, and rebalance the shards across the nodes.
+
+        :param _params: An optional dict with thresholds, see 'parameter_maps/databases/check_databases_usage_007' for examples.
+        :returns: result
+        """
+        params = dict({'max_ratio': 2.0, 'max_cv': .5, 'min_hot_shards': 2}, **(_params or {}))
+        shard_stats = self._get_shard_stats()
+        masters = {}
+        for shard in self.api().get('shards'):
+            if shard['role'] == 'master' and str(shard['uid']) in shard_stats:
+                masters.setdefault(shard['bdb_uid'], []).append(shard)
+
+        results = []
+        hot_shards = {}
+        for bdb in self.api().get('bdbs'):
+            desc = f"DU-007: Check shard skew of '{bdb['name']}' (max/median ratio, CV)."
+            shards = masters.get(bdb['uid'], [])
+            if len(shards) < 2:
+                results.append(('', {'master shards': len(shards)}, desc))
+                continue
+
+            info = {}
+            result = True
+            for key, name in (('total_req', 'ops'), ('used_memory', 'memory')):
+                values = {}
+                for shard in shards:
+                    try:
+                        values[str(shard['uid'])] = shard_stats[str(shard['uid'])]['intervals'].usage(key)[1]
+                    except ValueError:
+                        values[str(shard['uid'])] = .0
+
+                median = statistics.median(values.values())
+                mean = statistics.mean(values.values())
+                ratio = max(values.values()) / median if median else float('inf') if mean else 1.0
+                cv = statistics.pstdev(values.values()) / mean if mean else .0
+                info[name] = '{:.2f}/{:.2f} ratio/CV'.format(ratio, cv)
+                result = result and ratio <= params['max_ratio'] and cv <= params['max_cv']
+
+                hot = sorted(filter(lambda x: values[x] > params['max_ratio'] * median, values), key=int)
+                if hot:
+                    info[f'hot shards ({name})'] = ', '.join(map(lambda x: f'shard:{x}', hot))
+                for shard in filter(lambda x: str(x['uid']) in hot, shards):
+                    hot_shards.setdefault(str(shard['node_uid']), set()).add(str(shard['uid']))
+
+            results.append((result if _params else None, info, desc))
+
+        hot_nodes = {f'node:{uid}': ', '.join(map(lambda x: f'shard:{x}', sorted(uids, key=int)))
+                     for uid, uids in sorted(hot_shards.items()) if len(uids) >= params['min_hot_shards']}
+        results.append((not hot_nodes if _params else None, hot_nodes or {'hot nodes': None},
+                        "DU-007: Check hot nodes with several hot shards."))
+
+        return results
+
+    def check_databases_usage_008(self, _params):
+        """DU-008: Check memory capacity forecast of each database (days until memory limit).
+
+        Calls '/v1/bdbs' and '/v1/bdbs/stats' from API and fits a linear trend to 'used_memory' to estimate the days
+        until it reaches 'max_memory_usage' of 'memory_size'. Databases without memory limit are omitted.
+        If parameters are passed, compares the days to 'min_days'.
+
+        Remedy: Increase the memory limit or add shards before the limit is reached.
+
+        :param _params: An optional dict with thresholds, see 'parameter_maps/databases/check_databases_usage_008' for examples.
+        :returns: result
+        """
+        params = dict({'max_memory_usage': 1.0, 'min_days': 0}, **(_params or {}))
+        info = {}
+        results = {}
+
+        for bdb in self.api().get('bdbs'):
+            if not bdb['memory_size']:
+                continue
+
+            db_stats = self.api().get(f'bdbs/stats/{bdb["uid"]}')
+            try:
+                seconds = db_stats['intervals'].time_to('used_memory', bdb['memory_size'] * params['max_memory_usage'])
+            except ValueError:
+                continue
+
+            results[bdb['name']] = seconds is None or seconds >= params['min_days'] * 86400
+            info[bdb['name']] = '{} ({} GB limit)'.format(to_forecast(seconds), to_gb(bdb['memory_size']))
+
+        return all(results.values()) if _params else None, info
@@ -1,7 +1,10 @@
+import json
+import os
 import re
 
 from healthcheck.check_suites.base_suite import BaseCheckSuite
-from healthcheck.common_funcs import calc_usage, parse_semver, to_gb, to_percent, to_ms
+from healthcheck.log_scanner import LogScanner
+from healthcheck.common_funcs import inputs, parse_semver, to_forecast, to_gb, to_percent, to_ms, to_remote_python
 
 
 class Nodes(BaseCheckSuite):
@@ -153,6 +156,7 @@ class Nodes(BaseCheckSuite):
 
         return None, info
 
+    @inputs('nodes')
     def check_nodes_config_008(self, _params):
         """NC-008: Check RE version of each node.
 
@@ -277,6 +281,139 @@ class Nodes(BaseCheckSuite):
 
         return result, info
 
+    def check_nodes_config_013(self, _params):
+        """NC-013: Check network bandwidth between nodes (MB/s).
+
+        Runs a time-boxed throughput test between all nodes in rotating rounds, i.e. in round r each node sends to
+        the r-th next node while receiving from the r-th previous node, so no link and no node carries more than one
+        stream per direction at once. Each round starts the receivers of all nodes before any sender and uses its own
+        port, i.e. 'port' to 'port' + nodes - 2.
+        Outputs the achieved MB/s per link as measured by the sender until the receiver has read everything,
+        and the errors of receivers which could not bind their port or senders which could not connect.
+        If parameters are passed, compares the MB/s to 'min_mbps'.
+
+        Remedy: Investigate network connection between nodes, e.g. bandwidth limits of the network or instances.
+
+        :param _params: An optional dict with probe settings and thresholds, see 'parameter_maps/nodes/check_nodes_config_013' for examples.
+        :returns: result
+        """
+        params = dict({'port': 39000, 'seconds': 2.0, 'buffer': 4 * pow(1024, 2)}, **(_params or {}))
+        addrs = self.rex().get_addrs()
+        targets = list(addrs)
+        names = {target: f'node:{self.api().get_uid(addr)}' for target, addr in addrs.items()}
+        info = {names[target]: {} for target in targets}
+        results = []
+
+        for shift in range(1, len(targets)):
+            # a port per round, a receiver of a previous round may still wait for its sender
+            port = params['port'] + shift - 1
+            peers = {source: targets[(i + shift) % len(targets)] for i, source in enumerate(targets)}
+            sources = {peer: source for source, peer in peers.items()}
+
+            # start all receivers before any sender
+            cmd_targets = [(to_remote_python('bandwidth_probe', 'listen', port, params['seconds'], params['buffer']),
+                            peer) for peer in targets]
+            for future in self.rex().exec_multi(cmd_targets, _cacheable=False):
+                rsp = json.loads(future.result())
+                if 'error' in rsp:
+                    info[names[sources[future.target]]][names[future.target]] = rsp['error']
+                    results.append(False)
+
+            cmd_targets = [(to_remote_python('bandwidth_probe', 'send', port, addrs[peers[source]], params['seconds'],
+                                             params['buffer']), source)
+                           for source in targets if names[peers[source]] not in info[names[source]]]
+            for future in self.rex().exec_multi(cmd_targets, _cacheable=False) if cmd_targets else []:
+                rsp = json.loads(future.result())
+                link = info[names[future.target]]
+                if 'error' in rsp:
+                    link[names[peers[future.target]]] = rsp['error']
+                    results.append(False)
+                    continue
+
+                link[names[peers[future.target]]] = '{:.1f} MB/s'.format(rsp['sent'])
+                results.append(rsp['sent'] >= params.get('min_mbps', 0))
+
+        return all(results) if _params else None, info
+
+    def check_nodes_config_014(self, _params):
+        """NC-014: Check storage I/O performance of each node (persistent/ephemeral).
+
+        Runs a storage probe on all nodes in parallel, which writes a temporary file of 'size_mb' MB with direct I/O
+        under 'persistent_storage_path' and 'ephemeral_storage_path', measures fsync latency and random 4 KB reads
+        within 'seconds' per path and removes the file afterwards.
+        Outputs sequential write MB/s, random read IOPS and fsync p99 latency, and whether direct I/O was used or the
+        probe fell back to buffered I/O, e.g. on tmpfs.
+        If parameters are passed, compares them to 'min_write_mbps', 'min_read_iops' and 'max_fsync_p99_ms'.
+
+        Remedy: Use faster storage for persistence, e.g. local SSDs or provisioned IOPS volumes.
+
+        :param _params: An optional dict with probe settings and thresholds, see 'parameter_maps/nodes/check_nodes_config_014' for examples.
+        :returns: result
+        """
+        params = dict({'size_mb': 64, 'seconds': 2.0}, **(_params or {}))
+        if params['size_mb'] < 1:
+            raise ValueError(f"'size_mb' has to be at least 1, got {params['size_mb']}")
+
+        nodes = {str(node['uid']): node for node in self.api().get('nodes')}
+        cmd_targets = []
+        for target, addr in self.rex().get_addrs().items():
+            node = nodes[str(self.api().get_uid(addr))]
+            paths = {node['persistent_storage_path'], node['ephemeral_storage_path']}
+            cmd_targets.append((to_remote_python('storage_probe', params['size_mb'], params['seconds'], *sorted(paths),
+                                                 _sudo=True), target))
+
+        info = {}
+        results = []
+        for future in self.rex().exec_multi(cmd_targets, _cacheable=False):
+            node = nodes[str(self.api().get_uid(self.rex().get_addr(future.target)))]
+            probes = json.loads(future.result())
+            info[f'node:{node["uid"]}'] = node_info = {}
+            for kind in ['persistent', 'ephemeral']:
+                path = node[f'{kind}_storage_path']
+                probe = probes[path]
+                if 'error' in probe:
+                    node_info[kind] = probe['error']
+                    results.append(False)
+                    continue
+
+                # buffered I/O measures the page cache rather than the disk
+                node_info[kind] = '{:.1f} MB/s, {:.0f} IOPS, {} ms fsync p99 ({}, {})'.format(
+                    probe['write_mbps'], probe['read_iops'], to_ms(probe['fsync_p99_ms'] or .0), path,
+                    'direct' if probe['direct'] else 'buffered')
+                results.append(probe['write_mbps'] >= params.get('min_write_mbps', 0)
+                               and probe['read_iops'] >= params.get('min_read_iops', 0)
+                               and (probe['fsync_p99_ms'] or .0) <= params.get('max_fsync_p99_ms', float('inf')))
+
+        return all(results) if _params else None, info
+
+    def check_nodes_config_015(self, _params):
+        """NC-015: Check if RE logs have new errors.
+
+        Scans '/var/opt/redislabs/log/*.log' of each node for 'patterns', but only the bytes appended since the last
+        run, see '~/.healthcheck/logscan.json'. Outputs the counts of matching lines per file and the 'last' matches.
+
+        Remedy: Investigate the errors in the logs.
+
+        :param _params: An optional dict with patterns, see 'parameter_maps/nodes/check_nodes_config_015' for examples.
+        :returns: result
+        """
+        params = dict({'glob': '/var/opt/redislabs/log/*.log', 'patterns': [r'\berror\b', r'\bfatal\b'], 'last': 10},
+                      **(_params or {}))
+        results = LogScanner.inst().scan(self.rex(), params['glob'], params['patterns'], params['last'])
+
+        info = {}
+        for target, files in results.items():
+            node_info = {}
+            for path, result in sorted(files.items()):
+                if 'error' in result:
+                    node_info[os.path.basename(path)] = result['error']
+                elif any(result['counts'].values()):
+                    node_info[os.path.basename(path)] = {'counts': result['counts'], 'last': result['matches']}
+            if node_info:
+                info[f'node:{self.api().get_uid(self.rex().get_addr(target))}'] = node_info
+
+        return not info, info if info else {'OK': 'all'}
+
     def check_nodes_status_001(self, _params):
         """NS-001: Check if `cnm_ctl status` has errors.
 
@@ -347,7 +484,7 @@ class Nodes(BaseCheckSuite):
         quorum_onlys = self._get_quorum_only_nodes()
 
         for stats in self.api().get('nodes/stats'):
-            minimum, average, maximum, std_dev = calc_usage(stats['intervals'], 'cpu_idle')
+            minimum, average, maximum, std_dev = stats['intervals'].usage('cpu_idle')
 
             node_name = f'node:{stats["uid"]}'
             if stats['uid'] in quorum_onlys:
@@ -378,7 +515,7 @@ class Nodes(BaseCheckSuite):
         quorum_onlys = self._get_quorum_only_nodes()
 
         for stats in self.api().get('nodes/stats'):
-            minimum, average, maximum, std_dev = calc_usage(stats['intervals'], 'free_memory')
+            minimum, average, maximum, std_dev = stats['intervals'].usage('free_memory')
             total_mem = self.api().get_value(f'nodes/{stats["uid"]}', 'total_memory')
 
             node_name = f'node:{stats["uid"]}'
@@ -411,7 +548,7 @@ class Nodes(BaseCheckSuite):
         quorum_onlys = self._get_quorum_only_nodes()
 
         for stats in self.api().get('nodes/stats'):
-            minimum, average, maximum, std_dev = calc_usage(stats['intervals'], 'ephemeral_storage_avail')
+            minimum, average, maximum, std_dev = stats['intervals'].usage('ephemeral_storage_avail')
             total_size = self.api().get_value(f'nodes/{stats["uid"]}', 'ephemeral_storage_size')
 
             node_name = f'node:{stats["uid"]}'
@@ -443,7 +580,7 @@ class Nodes(BaseCheckSuite):
         quorum_onlys = self._get_quorum_only_nodes()
 
         for stats in self.api().get('nodes/stats'):
-            minimum, average, maximum, std_dev = calc_usage(stats['intervals'], 'persistent_storage_avail')
+            minimum, average, maximum, std_dev = stats['intervals'].usage('persistent_storage_avail')
             total_size = self.api().get_value(f'nodes/{stats["uid"]}', 'persistent_storage_size')
 
             node_name = f'node:{stats["uid"]}'
@@ -478,11 +615,89 @@ class Nodes(BaseCheckSuite):
             if stats['uid'] in quorum_onlys:
                 node_name += ' (quorum only)'
 
-            minimum, average, maximum, std_dev = calc_usage(stats['intervals'], 'ingress_bytes')
+            minimum, average, maximum, std_dev = stats['intervals'].usage('ingress_bytes')
             info[node_name] = {
                 'ingress': '{}/{}/{}/{} GB/s'.format(to_gb(minimum), to_gb(average), to_gb(maximum), to_gb(std_dev)),
             }
-            minimum, average, maximum, std_dev = calc_usage(stats['intervals'], 'egress_bytes')
+            minimum, average, maximum, std_dev = stats['intervals'].usage('egress_bytes')
             info[node_name]['egress'] = '{}/{}/{}/{} GB/s'.format(to_gb(minimum), to_gb(average), to_gb(maximum), to_gb(std_dev))
 
         return None, info
+
+    def check_nodes_usage_006(self, _params):
+        """NU-006: Check RAM and storage capacity forecast of each node (days until threshold).
+
+        Calls '/v1/nodes/stats' and fits a linear trend to 'free_memory', 'ephemeral_storage_avail' and
+        'persistent_storage_avail' to estimate the days until the used RAM reaches 'max_ram_usage', i.e. the RL
+        recommended maximum of 2/3, and the used storage reaches 'max_storage_usage' of the total size.
+        If parameters are passed, compares the days to 'min_days'.
+
+        Remedy: Add nodes or increase RAM and storage on nodes before the threshold is reached.
+
+        :param _params: An optional dict with thresholds, see 'parameter_maps/nodes/check_nodes_usage_006' for examples.
+        :returns: result
+        """
+        params = dict({'max_ram_usage': 2/3, 'max_storage_usage': .9, 'min_days': 0}, **(_params or {}))
+        info = {}
+        results = {}
+
+        for stats in self.api().get('nodes/stats'):
+            node = self.api().get(f'nodes/{stats["uid"]}')
+            node_name = f'node:{stats["uid"]}'
+            forecasts = {}
+            for name, key, total_key, max_usage in [
+                    ('RAM', 'free_memory', 'total_memory', params['max_ram_usage']),
+                    ('ephemeral storage', 'ephemeral_storage_avail', 'ephemeral_storage_size', params['max_storage_usage']),
+                    ('persistent storage', 'persistent_storage_avail', 'persistent_storage_size', params['max_storage_usage'])]:
+                try:
+                    forecasts[name] = stats['intervals'].time_to(key, node[total_key] * (1 - max_usage), True)
+                except (KeyError, ValueError):
+                    continue
+
+            results[node_name] = all(x is None or x >= params['min_days'] * 86400 for x in forecasts.values())
+            info[node_name] = {name: to_forecast(seconds) for name, seconds in forecasts.items()}
+
+        return all(results.values()) if _params else None, info
+
+    def check_nodes_usage_007(self, _params):
+        """NU-007: Check CPU saturation of each node with a high-resolution sampler (avg/max).
+
+        Runs a sampler on all nodes in parallel for 'duration' seconds, which reads '/proc/stat', '/proc/meminfo' and
+        '/proc/pressure/*' every 'interval' seconds and the CPU time of the 'redis-server' and 'dmcproxy' processes.
+        Outputs avg/max of busy, iowait and steal CPU time and of PSI stalls, the minimum of available memory and the
+        busiest processes (% of one CPU).
+        If parameters are passed, compares the maximums to 'max_steal', 'max_iowait' and 'max_psi' (in %).
+
+        Remedy: Investigate noisy neighbours (steal), slow storage (iowait) or the busiest processes.
+
+        :param _params: An optional dict with sampler settings and thresholds, see 'parameter_maps/nodes/check_nodes_usage_007' for examples.
+        :returns: result
+        """
+        params = dict({'duration': 2.0, 'interval': .25}, **(_params or {}))
+        cmd = to_remote_python('node_sampler', params['duration'], params['interval'], 'redis-server', 'dmcproxy')
+        info = {}
+        results = {}
+
+        def to_avg_max(_values):
+            # sampled values are per mille
+            if not _values:
+                return 'n/a'
+            return '{}/{} %'.format(to_percent(sum(_values) / len(_values) / 10), to_percent(max(_values) / 10))
+
+        for rsp in self.rex().exec_broad(cmd, _cacheable=False):
+            samples = json.loads(rsp.result())
+            node_name = f'node:{self.api().get_uid(self.rex().get_addr(rsp.target))}'
+            info[node_name] = {
+                'busy': to_avg_max(samples['busy']),
+                'iowait': to_avg_max(samples['iowait']),
+                'steal': to_avg_max(samples['steal']),
+                'PSI (cpu/memory/io)': ', '.join(map(lambda x: to_avg_max(samples['psi'].get(x)), ['cpu', 'memory', 'io'])),
+                'available memory': '{} GB'.format(to_gb(min(samples['mem_avail'] or [0]) * pow(1024, 2))),
+                'busiest processes': ', '.join(map(lambda x: '{} ({} %)'.format(x[0], to_percent(x[1] / 10)),
+                                                   samples['procs'])) or None}
+
+            maximums = {key: max(samples[key] or [0]) / 10 for key in ['iowait', 'steal']}
+            maximums['psi'] = max([max(values or [0]) for values in samples['psi'].values()] or [0]) / 10
+            results[node_name] = all(maximums[key] <= params.get(f'max_{key}', float('inf')) for key in maximums)
+
+        return all(results.values()) if _params else None, info
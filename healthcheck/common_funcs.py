@@ -1,38 +1,28 @@
+import asyncio
 import base64
-import functools
 import json
-import math
 import logging
+import os
 import re
-import socket
 import ssl
+import tempfile
+import time
 
 from subprocess import run, PIPE
 from urllib import request
 
+from healthcheck.interval_stats import percentile
+from healthcheck.resp_client import ConnectionPool, NOT_READY, RespConnection, RespError, RespParser, encode_command
+
+SLOWLOG_ENTRY = re.compile(r'^( *\d+\) )1\) \(integer\) (\d+)$')
+SLOWLOG_FIELD = re.compile(r'^(\d+)\) (.*)$')
+
 SSL_CONTEXT = ssl.create_default_context()
 SSL_CONTEXT.check_hostname = False
 SSL_CONTEXT.verify_mode = ssl.CERT_NONE
 
 GB = pow(1024, 3)
-
-
-def calc_usage(_values, _key):
-    """
-    Calculate minimum, average, maximum and standard deviation.
-
-    :param _values: A list of value dicts.
-    :param _key: The key of the value.
-    :return: A tuple (minimum, average, maximum, standard deviation).
-    """
-    vals = list(filter(lambda x: x.get(_key), _values))
-    min_ = min([i[_key] for i in vals])
-    avg = sum(i[_key] for i in vals) / len(vals)
-    max_ = max([i[_key] for i in filter(lambda i: i.get(_key), vals)])
-    q_sum = functools.reduce(lambda x, y: x + pow(y[_key] - avg, 2), vals, 0)
-    std_dev = math.sqrt(q_sum / len(vals))
-
-    return min_, avg, max_, std_dev
+REMOTE_SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'remote_scripts')
 
 
 def parse_semver(_version):
@@ -87,6 +77,170 @@ def to_ms(_value):
     return '{:.3f}'.format(_value)
 
 
+def to_days(_value):
+    """
+    Convert a numeric value from seconds to days.
+
+    :param _value: A numeric value in seconds.
+    :return: The rounded numeric value in days.
+    """
+    return '{:.1f}'.format(_value / 86400)
+
+
+def to_forecast(_value):
+    """
+    Convert an estimated time until a threshold is reached, see `IntervalStats.time_to`.
+
+    :param _value: The seconds until the threshold is reached, 0 if already reached or None if not approaching.
+    :return: The forecast string.
+    """
+    if _value is None:
+        return 'not approaching'
+    if not _value:
+        return 'reached'
+
+    return '{} days'.format(to_days(_value))
+
+
+def inputs(*_topics):
+    """
+    Declare the API topics a check depends on exclusively, so its result can be reused as long as they are unchanged.
+
+    :param _topics: The API topics, e.g. 'bdbs'.
+    :return: The decorator.
+    """
+    def decorator(_func):
+        _func.inputs = _topics
+        return _func
+
+    return decorator
+
+
+def to_remote_script(_cmds):
+    """
+    Join commands into a single `bash -c` invocation, so pipes and separators are executed on the remote machine
+    regardless of the remote executor mode.
+
+    :param _cmds: A list of commands without double quotes, dollar signs and backslashes.
+    :return: The command string.
+    """
+    return 'bash -c "{}"'.format('; '.join(_cmds))
+
+
+def to_remote_python(_name, *_args, _sudo=False):
+    """
+    Encode a script of 'healthcheck/remote_scripts' into a command, which runs it with `python` on the remote machine.
+
+    The script is passed base64 encoded, so it needs neither quoting nor a copy on the remote machine.
+
+    :param _name: The name of the script, e.g. 'node_sampler'.
+    :param _args: The arguments passed to the script.
+    :param _sudo: If the script is run with `sudo`, defaults to False.
+    :return: The command string.
+    """
+    with open(os.path.join(REMOTE_SCRIPTS_DIR, f'{_name}.py'), 'rb') as file:
+        script = base64.b64encode(file.read()).decode()
+    python = 'sudo python' if _sudo else 'python'
+
+    return to_remote_script([f'echo {script} | base64 -d | {python} - {" ".join(map(str, _args))}'])
+
+
+def parse_info(_info):
+    """
+    Parse the output of the Redis INFO command.
+
+    :param _info: The output of INFO.
+    :return: A dict mapping keys to values, values of 'key=value,...' lists are parsed into dicts.
+    """
+    info = {}
+    for line in _info.splitlines():
+        if not line or line.startswith('#') or ':' not in line:
+            continue
+        key, value = line.strip().split(':', 1)
+        if '=' in value and ',' in value:
+            value = dict(map(lambda x: x.split('=', 1), filter(lambda x: '=' in x, value.split(','))))
+        info[key] = value
+
+    return info
+
+
+def parse_slowlog(_output):
+    """
+    Parse the formatted output of SLOWLOG GET, entry by entry.
+
+    Entries are nested lists of ID, timestamp, duration and the command with its arguments, e.g.
+    '1) 1) (integer) 14', '   2) (integer) 1309448221', '   3) (integer) 15', '   4) 1) "ping"'.
+    Indexes are right-aligned, the fields of an entry are indented by the width of the entry's index.
+
+    :param _output: The output of `shard-cli <UID> --no-raw SLOWLOG GET <N>`.
+    :return: A generator of tuples (ID, timestamp, duration in microseconds, command name).
+    """
+    fields, indent = None, 0
+    for line in _output.splitlines() + ['']:
+        match = SLOWLOG_ENTRY.match(line)
+        if match or not line:
+            entry = _to_slowlog_entry(fields) if fields else None
+            if entry:
+                yield entry
+            fields, indent = ({1: match.group(2)}, len(match.group(1))) if match else (None, 0)
+            continue
+
+        # fields of the current entry only, i.e. skip the elements of nested lists
+        match = SLOWLOG_FIELD.match(line[indent:]) if fields and not line[:indent].strip() else None
+        if match:
+            fields.setdefault(int(match.group(1)), match.group(2))
+
+
+def _to_slowlog_entry(_fields):
+    """
+    Convert the fields of a SLOWLOG entry.
+
+    :param _fields: A dict mapping field indexes to values, e.g. {2: '(integer) 1309448221', 4: '1) "ping"'}.
+    :return: A tuple (ID, timestamp, duration in microseconds, command name) or None if a field is missing or invalid.
+    """
+    integers = [re.fullmatch(r'(?:\(integer\) )?(\d+)', _fields.get(i, '')) for i in (1, 2, 3)]
+    command = re.fullmatch(r' *1\) "(.*)"', _fields.get(4, ''))
+    if not all(integers) or not command:
+        return None
+
+    return int(integers[0].group(1)), int(integers[1].group(1)), int(integers[2].group(1)), command.group(1).upper()
+
+
+def parse_latency_latest(_output):
+    """
+    Parse the raw output of LATENCY LATEST, event by event.
+
+    :param _output: The output of `shard-cli <UID> LATENCY LATEST`.
+    :return: A generator of tuples (event name, timestamp, latest latency in ms, maximum latency in ms).
+    """
+    lines = _output.splitlines()
+    for i in range(0, len(lines) - 3, 4):
+        try:
+            yield lines[i].strip(), int(lines[i + 1]), int(lines[i + 2]), int(lines[i + 3])
+        except ValueError:
+            return
+
+
+def write_atomic(_path, _text):
+    """
+    Write a file atomically, i.e. through a unique temporary file in the same directory.
+
+    :param _path: The path of the file.
+    :param _text: The text to write.
+    :raise OSError: If an error occurred.
+    """
+    os.makedirs(os.path.dirname(_path), exist_ok=True)
+    fd, name = tempfile.mkstemp(prefix=os.path.basename(_path) + '.', suffix='.tmp', dir=os.path.dirname(_path))
+    try:
+        with os.fdopen(fd, 'w') as file:
+            file.write(_text)
+        os.replace(name, _path)
+    except BaseException:
+        if os.path.exists(name):
+            os.remove(name)
+        raise
+
+
 def exec_cmd(_args, _shell=True):
     """
     Execute a command in a subprocess.
@@ -137,39 +291,34 @@ def get_parameter_map_name(_path):
     return _path.split('/')[-1:][0].split('.')[0]
 
 
-def redis_ping(_host, _port, auth=None):
+def _is_pong(_reply):
+    """
+    Check if a reply to PING is 'PONG'.
+
+    Accept endpoint even if the provided password is invalid, i.e. on 'NOAUTH'.
+
+    :param _reply: The reply.
+    :return: Boolean
+    """
+    return _reply == 'PONG' or isinstance(_reply, RespError) and str(_reply).startswith('NOAUTH')
+
+
+def redis_ping(_host, _port, auth=None, _timeout=5.0):
     """
     PING a Redis database.
 
     :param _host: A Redis database host.
     :param _port: A Redis database port.
     :param auth: An optional Redis database password.
-    :return: True on success, False otherwise, error message on error.
+    :param _timeout: The timeout of connect and each request in seconds, defaults to 5.
+    :return: True on success, the reply otherwise, error message on error.
     """
     conn = None
     try:
-        conn = socket.create_connection((_host, _port))
-        if auth:
-            sent = conn.send(b'AUTH ' + auth.encode() + b'\r\n')
-            if not sent:
-                raise Exception('could not send AUTH to Redis server')
-
-            recv = conn.recv(5)
-            if not recv == b'+OK\r\n':
-                raise Exception('invalid AUTH value sent to Redis server')
+        conn = RespConnection(_host, _port, auth, _timeout)
+        reply = conn.pipeline([('PING',)])[0]
 
-        sent = conn.send(b'PING\r\n')
-        if not sent:
-            raise Exception('could not send PING message to Redis server')
-
-        recv = conn.recv(7)
-
-        # accept endpoint even if the provided password is invalid
-        if recv == b'-NOAUTH':
-            _ = conn.recv(2)
-            return True
-
-        return recv == b'+PONG\r\n' or recv
+        return _is_pong(reply) or str(reply)
 
     except Exception as e:
         return str(e)
@@ -179,6 +328,129 @@ def redis_ping(_host, _port, auth=None):
             conn.close()
 
 
+def redis_latency(_host, _port, _auth=None, _count=100, _pipeline=100, _timeout=1.0, _max_seconds=2.0):
+    """
+    Measure the latency of a Redis database with a burst of PINGs.
+
+    Sends up to `_count` PINGs one after another, then `_pipeline` PINGs at once and stops after `_max_seconds`.
+
+    :param _host: A Redis database host.
+    :param _port: A Redis database port.
+    :param _auth: An optional Redis database password.
+    :param _count: The amount of non-pipelined PINGs, defaults to 100.
+    :param _pipeline: The amount of pipelined PINGs, defaults to 100.
+    :param _timeout: The timeout of connect and each request in seconds, defaults to 1.
+    :param _max_seconds: The maximum duration of the measurement in seconds, defaults to 2.
+    :return: A dict with latencies 'p50', 'p99', 'max' in seconds, 'ops/s' and 'pipelined ops/s'.
+    :raise Exception: If an error occurred.
+    """
+    def check_pongs(_replies):
+        for reply in _replies:
+            if not _is_pong(reply):
+                raise Exception(f'unexpected response to PING: {reply}')
+
+    deadline = time.perf_counter() + _max_seconds
+    with ConnectionPool.inst().connection(_host, _port, _auth, _timeout) as conn:
+        latencies = []
+        start = time.perf_counter()
+        while len(latencies) < _count and time.perf_counter() < deadline:
+            sent = time.perf_counter()
+            check_pongs(conn.pipeline([('PING',)]))
+            latencies.append(time.perf_counter() - sent)
+        elapsed = time.perf_counter() - start
+
+        pipelined_ops = None
+        if _pipeline and time.perf_counter() < deadline:
+            start = time.perf_counter()
+            check_pongs(conn.pipeline([('PING',)] * _pipeline))
+            pipelined_ops = _pipeline / (time.perf_counter() - start)
+
+    latencies.sort()
+    return {'p50': percentile(latencies, 50) if latencies else None,
+            'p99': percentile(latencies, 99) if latencies else None,
+            'max': latencies[-1] if latencies else None,
+            'ops/s': len(latencies) / elapsed if latencies else None,
+            'pipelined ops/s': pipelined_ops}
+
+
+async def _redis_ping_async(_host, _port, _auth, _timeout, _semaphore):
+    """
+    PING a Redis database asynchronously.
+
+    :param _host: A Redis database host.
+    :param _port: A Redis database port.
+    :param _auth: An optional Redis database password.
+    :param _timeout: The timeout of connect and each request in seconds.
+    :param _semaphore: A semaphore bounding the amount of concurrent connections.
+    :return: A tuple (result, connect time, PING round-trip time), result like `redis_ping`, times in seconds.
+    """
+    async with _semaphore:
+        writer = None
+        connect_time, ping_time = None, None
+        try:
+            start = time.perf_counter()
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(_host, _port), _timeout)
+            connect_time = time.perf_counter() - start
+            parser = RespParser()
+
+            async def request(*_args):
+                writer.write(encode_command(_args))
+                reply = parser.gets()
+                while reply is NOT_READY:
+                    data = await asyncio.wait_for(reader.read(65536), _timeout)
+                    if not data:
+                        raise ConnectionError(f'connection to {_host}:{_port} closed')
+                    parser.feed(data)
+                    reply = parser.gets()
+                return reply
+
+            if _auth:
+                reply = await request('AUTH', _auth)
+                if isinstance(reply, RespError):
+                    raise reply
+
+            start = time.perf_counter()
+            reply = await request('PING')
+            ping_time = time.perf_counter() - start
+
+            result = _is_pong(reply) or str(reply)
+
+        except asyncio.TimeoutError:
+            result = f'timed out after {_timeout} seconds'
+
+        except Exception as e:
+            result = str(e)
+
+        finally:
+            if writer:
+                writer.close()
+
+        return result, connect_time, ping_time
+
+
+def redis_ping_all(_endpoints, _timeout=5.0, _max_connections=64):
+    """
+    PING many Redis databases concurrently.
+
+    :param _endpoints: A list of tuples (host, port, password), password is optional.
+    :param _timeout: The timeout of connect and each request in seconds, defaults to 5.
+    :param _max_connections: The maximum amount of concurrent connections, defaults to 64.
+    :return: A dict mapping (host, port) to tuples (result, connect time, PING round-trip time), see `redis_ping`.
+    """
+    async def ping_all():
+        semaphore = asyncio.Semaphore(_max_connections)
+        return await asyncio.gather(*[_redis_ping_async(host, port, auth, _timeout, semaphore)
+                                      for host, port, auth in _endpoints])
+
+    loop = asyncio.new_event_loop()
+    try:
+        results = loop.run_until_complete(ping_all())
+    finally:
+        loop.close()
+
+    return {(host, port): result for (host, port, _), result in zip(_endpoints, results)}
+
+
 def is_api_configured(config):
     """
     Check if an [api] section was found in the configuration file.
@@ -191,9 +463,9 @@ def is_api_configured(config):
 
 def is_rex_configured(config):
     """
-    Check if a [ssh], [docker] or [k8s] section was found in the configuration file.
+    Check if a [ssh], [docker], [k8s] or [local] section was found in the configuration file.
 
     :param config:
     :return: Boolean
     """
-    return any(map(lambda x: x in config, ['ssh', 'docker', 'k8s']))
+    return any(map(lambda x: x in config, ['ssh', 'docker', 'k8s', 'local']))
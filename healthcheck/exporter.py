@@ -0,0 +1,79 @@
+import threading
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+from healthcheck.printer_funcs import print_msg
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class Exporter(object):
+    """
+    Exporter class.
+
+    Serves the last published check results via HTTP, so a scrape never triggers API calls or remote commands.
+    """
+
+    def __init__(self, _addr):
+        """
+        :param _addr: The address to listen on, e.g. ':9877' or '127.0.0.1:9877'.
+        """
+        host, port = _addr.rsplit(':', 1)
+        self.buffer = None
+        self.lock = threading.Lock()
+
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with exporter.lock:
+                    buffer = exporter.buffer
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                elif buffer is None:
+                    self.send_error(503, 'no results yet')
+                else:
+                    self.send_response(200)
+                    self.send_header('Content-Type', CONTENT_TYPE)
+                    self.send_header('Content-Length', str(len(buffer)))
+                    self.end_headers()
+                    self.wfile.write(buffer)
+
+            def log_message(self, *_args):
+                pass
+
+        self.server = _ThreadingHTTPServer((host, int(port)), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        """
+        Start serving in a background thread.
+
+        :return: The exporter.
+        """
+        self.thread.start()
+        print_msg('serving metrics on {}:{}'.format(*self.server.server_address))
+
+        return self
+
+    def publish(self, _text):
+        """
+        Publish rendered results, replacing the previous ones.
+
+        :param _text: The rendered results.
+        """
+        buffer = _text.encode()
+        with self.lock:
+            self.buffer = buffer
+
+    def stop(self):
+        """
+        Stop serving.
+        """
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,207 @@
+import array
+import datetime
+import math
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+NAN = float('nan')
+
+
+def _to_timestamp(_value):
+    """
+    Convert an interval time, e.g. '2020-01-01T00:00:00Z', to a POSIX timestamp.
+
+    :param _value: The interval time string.
+    :return: The timestamp in seconds or NaN if not parsable.
+    """
+    try:
+        return datetime.datetime.fromisoformat(_value.replace('Z', '+00:00')).timestamp()
+    except (AttributeError, ValueError):
+        return NAN
+
+
+def percentile(_sorted, _p):
+    """
+    Calculate a percentile with linear interpolation.
+
+    :param _sorted: A sorted sequence of values.
+    :param _p: The percentile, e.g. 95.
+    :return: The percentile value.
+    """
+    pos = (len(_sorted) - 1) * _p / 100
+    lower = int(pos)
+    upper = min(lower + 1, len(_sorted) - 1)
+
+    return _sorted[lower] + (_sorted[upper] - _sorted[lower]) * (pos - lower)
+
+
+class IntervalStats(object):
+    """
+    Interval Statistics class.
+
+    Holds the values of stats intervals in columns, i.e. one typed array per metric and a timestamp column.
+    Statistics and trends are calculated once per metric, using NumPy if installed.
+    """
+
+    def __init__(self, _intervals):
+        """
+        :param _intervals: A list of interval dicts, e.g. from '/v1/nodes/stats'.
+        """
+        self.columns = {}
+        self.summaries = {}
+        self.trends = {}
+
+        keys = {}
+        for interval in _intervals:
+            for key, value in interval.items():
+                if key not in keys and type(value) in (int, float):
+                    keys[key] = None
+
+        # missing values are NaN
+        for key in keys:
+            try:
+                self.columns[key] = array.array('d', [interval.get(key, NAN) for interval in _intervals])
+            except TypeError:
+                self.columns[key] = array.array('d', [interval.get(key) if type(interval.get(key)) in (int, float)
+                                                      else NAN for interval in _intervals])
+        self.timestamps = array.array('d', [_to_timestamp(interval.get('stime')) for interval in _intervals])
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def column(self, _key):
+        """
+        Get the column of a metric.
+
+        :param _key: The key of the metric.
+        :return: A memoryview of the values, NaN for missing values.
+        """
+        return memoryview(self.columns[_key]) if _key in self.columns else memoryview(array.array('d'))
+
+    def usage(self, _key):
+        """
+        Calculate minimum, average, maximum and standard deviation.
+
+        :param _key: The key of the metric.
+        :return: A tuple (minimum, average, maximum, standard deviation).
+        :raise ValueError: If there are no values.
+        """
+        summary = self.summary(_key)
+
+        return summary['min'], summary['avg'], summary['max'], summary['dev']
+
+    def summary(self, _key):
+        """
+        Calculate minimum, average, maximum and standard deviation.
+
+        Zero and missing values are omitted.
+
+        :param _key: The key of the metric.
+        :return: A dict with 'min', 'avg', 'max' and 'dev'.
+        :raise ValueError: If there are no values.
+        """
+        if _key not in self.summaries:
+            self.summaries[_key] = self._summarize(self.columns.get(_key, array.array('d')), _key)
+
+        return self.summaries[_key]
+
+    def trend(self, _key):
+        """
+        Fit a linear trend with streaming least squares, i.e. in one pass over the column.
+
+        Missing values are omitted.
+
+        :param _key: The key of the metric.
+        :return: A tuple (slope per second, fitted value at the last timestamp).
+        :raise ValueError: If there are less than two values at distinct timestamps.
+        """
+        if _key not in self.trends:
+            self.trends[_key] = self._fit(self.columns.get(_key, array.array('d')), self.timestamps, _key)
+
+        return self.trends[_key]
+
+    def time_to(self, _key, _threshold, _falling=False):
+        """
+        Estimate the time until the trend of a metric reaches a threshold.
+
+        :param _key: The key of the metric.
+        :param _threshold: The threshold.
+        :param _falling: If the threshold is reached from above, e.g. for free memory, defaults to False.
+        :return: The seconds until the threshold is reached, 0 if already reached or None if the trend is not heading
+        towards the threshold.
+        :raise ValueError: If there are less than two values at distinct timestamps.
+        """
+        slope, value = self.trend(_key)
+        if _falling:
+            slope, value, _threshold = -slope, -value, -_threshold
+
+        if value >= _threshold:
+            return 0
+        if slope <= 0:
+            return None
+
+        return (_threshold - value) / slope
+
+    @staticmethod
+    def _fit(_column, _timestamps, _key):
+        """
+        Fit a linear trend with running means and co-moments, which is numerically stable for POSIX timestamps.
+
+        :param _column: The column.
+        :param _timestamps: The timestamp column.
+        :param _key: The key of the metric.
+        :return: A tuple (slope per second, fitted value at the last timestamp).
+        :raise ValueError: If there are less than two values at distinct timestamps.
+        """
+        count = 0
+        mean_t = mean_y = cov = var = .0
+        last_t = NAN
+        for t, y in zip(_timestamps, _column):
+            if t != t or y != y:
+                continue
+            count += 1
+            delta_t = t - mean_t
+            mean_t += delta_t / count
+            mean_y += (y - mean_y) / count
+            cov += delta_t * (y - mean_y)
+            var += delta_t * (t - mean_t)
+            last_t = t
+
+        if count < 2 or not var:
+            raise ValueError(f"not enough values of '{_key}' found")
+
+        slope = cov / var
+
+        return slope, mean_y + slope * (last_t - mean_t)
+
+    @staticmethod
+    def _summarize(_column, _key):
+        """
+        Calculate the summary of a column.
+
+        :param _column: The column.
+        :param _key: The key of the metric.
+        :return: The summary dict.
+        :raise ValueError: If there are no values.
+        """
+        if numpy is not None:
+            values = numpy.frombuffer(_column, dtype=numpy.float64) if len(_column) else numpy.empty(0)
+            values = values[(values != 0) & ~numpy.isnan(values)]
+            if not len(values):
+                raise ValueError(f"no values of '{_key}' found")
+
+            return {'min': float(values.min()), 'avg': float(values.mean()), 'max': float(values.max()),
+                    'dev': float(values.std())}
+
+        values = list(filter(lambda x: x and x == x, _column))
+        if not values:
+            raise ValueError(f"no values of '{_key}' found")
+
+        avg = math.fsum(values) / len(values)
+        # two passes, i.e. no cancellation of large values with a small spread
+        variance = math.fsum(map(lambda x: (x - avg) ** 2, values)) / len(values)
+
+        return {'min': min(values), 'avg': avg, 'max': max(values), 'dev': math.sqrt(variance)}
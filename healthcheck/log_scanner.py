@@ -0,0 +1,103 @@
+import base64
+import fcntl
+import json
+import os
+
+from contextlib import contextmanager
+from threading import Lock
+
+from healthcheck.common_funcs import to_remote_python, write_atomic
+
+STATE_PATH = '~/.healthcheck/logscan.json'
+
+
+class LogScanner(object):
+    """
+    Log Scanner class.
+
+    Scans log files of all nodes incrementally, i.e. only the bytes appended since the last scan.
+    The inode and byte offset of each file are kept per cluster and target in a local state file, which is shared by
+    concurrent invocations, i.e. re-read and merged under a file lock.
+    """
+    _instance = None
+
+    def __init__(self, _path=STATE_PATH):
+        """
+        :param _path: The path of the state file, defaults to '~/.healthcheck/logscan.json'.
+        """
+        self.path = os.path.expanduser(_path)
+        self.lock = Lock()
+
+    @classmethod
+    def inst(cls):
+        """
+        Get singleton instance.
+
+        :return: The LogScanner singleton.
+        """
+        if not cls._instance:
+            cls._instance = LogScanner()
+
+        return cls._instance
+
+    def scan(self, _rex, _glob, _patterns, _last=10, _max_bytes=64 * pow(1024, 2)):
+        """
+        Scan the new bytes of log files on all targets and persist the new offsets.
+
+        :param _rex: The remote executor.
+        :param _glob: A glob of the log files, e.g. '/var/opt/redislabs/log/*.log'.
+        :param _patterns: A list of regular expressions, matched case-insensitive.
+        :param _last: The amount of last matches returned per file, defaults to 10.
+        :param _max_bytes: The maximum amount of bytes scanned per file, older new bytes are skipped.
+        :return: A dict mapping targets to dicts mapping files to results.
+        :raise Exception: If an error occurred.
+        """
+        cmd_targets = []
+        with self.locked():
+            state = self._load().get(_rex.cluster, {})
+        for target in _rex.get_targets():
+            args = {'glob': _glob, 'patterns': _patterns, 'offsets': state.get(target, {}), 'last': _last,
+                    'max_bytes': _max_bytes}
+            cmd_targets.append((to_remote_python('log_scan', base64.b64encode(json.dumps(args).encode()).decode()),
+                                target))
+
+        results = {future.target: json.loads(future.result()) for future in _rex.exec_multi(cmd_targets, _cacheable=False)}
+
+        # merge into the current state, other invocations may have saved offsets in the meantime
+        with self.locked():
+            state = self._load()
+            cluster = state.setdefault(_rex.cluster, {})
+            for target, files in results.items():
+                # keep the offsets of files which could not be scanned
+                offsets = cluster.get(target, {})
+                cluster[target] = {path: offsets.get(path, {}) if 'error' in result else
+                                   {'inode': result['inode'], 'offset': result['offset']}
+                                   for path, result in files.items()}
+            write_atomic(self.path, json.dumps(state))
+
+        return results
+
+    @contextmanager
+    def locked(self):
+        """
+        Lock the state file against other threads and processes.
+        """
+        os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+        with self.lock, open(self.path + '.lock', 'w') as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+
+    def _load(self):
+        """
+        Read the state file.
+
+        :return: A dict mapping clusters to dicts mapping targets to offsets.
+        """
+        if not os.path.exists(self.path):
+            return {}
+
+        with open(self.path) as file:
+            return json.loads(file.read())
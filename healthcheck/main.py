@@ -1,16 +1,31 @@
 import argparse
 import configparser
+import functools
 import glob
 import importlib
+import io
 import json
 import logging
+import multiprocessing
 import os
+import time
+import types
 
-from healthcheck.check_suites.base_suite import BaseCheckSuite
+from healthcheck.api_fetcher import ApiFetcher
+from healthcheck.cache_service import CacheService, SOCKET_PATH
+from healthcheck.check_cache import CheckCache
 from healthcheck.check_executor import CheckExecutor
+from healthcheck.check_registry import CheckRegistry, PARAMETER_MAPS_DIR, get_meta
+from healthcheck.exporter import Exporter
 from healthcheck.common_funcs import get_parameter_map_name, is_api_configured, is_rex_configured
-from healthcheck.printer_funcs import print_list, print_error, print_warning
+from healthcheck.printer_funcs import print_fleet, print_list, print_error, print_msg, print_warning
+from healthcheck.profile_recorder import ProfileRecorder
+from healthcheck.remote_executor import RemoteExecutor
+from healthcheck.render_pipeline import RenderPipeline
+from healthcheck.resp_client import ConnectionPool
+from healthcheck.result_store import ResultStore, RETENTION, STORE_PATH
 from healthcheck.stats_collector import StatsCollector
+from healthcheck.trace_recorder import TraceRecorder
 
 
 def parse_args():
@@ -28,8 +43,28 @@ def parse_args():
     options.add_argument('-p', '--params', help="Specify a parameter map to use.", type=str)
     options.add_argument('-s', '--suite', help="Specify a suite to execute.", type=str)
     options.add_argument('-cfg', '--config', help="Path to config file", type=str, default='config.ini')
-
-    return parser.parse_args()
+    options.add_argument('-P', '--profile', help="Profile checks, suite loading and rendering into a directory.",
+                         type=str, nargs='?', const='profile')
+    options.add_argument('-t', '--trace', help="Write a Chrome trace of the run into a file.", type=str)
+    options.add_argument('-i', '--incremental', help="Reuse results of the previous run for checks with unchanged inputs.",
+                         action='store_true')
+    options.add_argument('-w', '--watch', help="Execute checks every given amount of seconds until interrupted.",
+                         type=float)
+    options.add_argument('-C', '--config-dir', help="Execute checks against each cluster configured by a *.ini file "
+                                                    "in a directory, the results of a cluster are rendered after all "
+                                                    "its checks completed.", type=str)
+    options.add_argument('-j', '--jobs', help="Amount of clusters checked in parallel, defaults to the CPU count.",
+                         type=int, default=os.cpu_count() or 1)
+    options.add_argument('--cache-service', help="Serve a cache for concurrent invocations on the socket configured "
+                                                 "in the [cache] section.", action='store_true')
+    options.add_argument('-S', '--serve', help="Serve results as OpenMetrics on an address, e.g. ':9877', "
+                                               "refreshed every 60 seconds or as given by --watch.", type=str)
+
+    args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error(f'argument -j/--jobs: has to be at least 1, got {args.jobs}')
+
+    return args
 
 
 def parse_config(_args):
@@ -50,46 +85,24 @@ def parse_config(_args):
         print_warning('no [api] configuration found')
 
     if not is_rex_configured(config):
-        print_warning('no [ssh], [docker] or [k8s] configuration found')
+        print_warning('no [ssh], [docker], [k8s] or [local] configuration found')
 
     return config
 
 
-def import_renderer(config):
-    """
-    Load configured renderer module, falls back to 'basic'.
-
-    :param config: A parsed configuration file.
-    """
-    if 'renderer' in config and 'module' in config['renderer']:
-        renderer = config['renderer']['module']
-    else:
-        renderer = 'basic'
-
-    return importlib.import_module('healthcheck.result_renderers.{}_renderer'.format(renderer))
-
-
 def load_check_suites(_args, _config, _check_connection=True):
     """
-    Load all check suites.
+    Load check suites, only the suites selected by --suite and --check are imported.
 
     :param _args: The pasred command line arguments.
     :param _config: The parsed configuration.
     :param _check_connection: Run connection checks, defaults to True.
     :return: A list with all instantiated check suites.
     """
-    suites = []
-    for file in glob.glob('healthcheck/check_suites/suite_*.py'):
-        name = file.replace('/', '.').replace('.py', '')
-        module = importlib.import_module(name)
-        for member in dir(module):
-            if member != BaseCheckSuite.__name__ and not member.startswith('__'):
-                suite = getattr(module, member)
-                if type(suite) == type.__class__ and issubclass(suite, BaseCheckSuite):
-                    if not _args.suite or _args.suite and _args.suite.lower() in suite.__doc__.lower():
-                        suites.append(suite(_config))
+    registry = CheckRegistry.inst()
 
-    return suites
+    return [registry.load_suite(suite, _config) for suite in registry.get_suites(_args.suite, _args.check)
+            if suite['checks'] or not _args.check]
 
 
 def find_checks(_suites, _args, _config):
@@ -102,24 +115,16 @@ def find_checks(_suites, _args, _config):
     :return: A list with found checks to execute.
     """
     checks = []
+    manifest = {suite['name']: suite for suite in CheckRegistry.inst().get_suites(_args.suite, _args.check)}
     for suite in _suites:
-        for check in filter(lambda x: x.startswith('check_'), dir(suite)):
-            check_func = getattr(suite, check)
-            if _args.check:
-                check_doc = check_func.__doc__.split('\n')[0].lower()
-                check_args = map(lambda x: x.strip(), _args.check.lower().split(','))
-                if not list(filter(lambda x: x in check_func.__name__ or x in check_doc, check_args)):
-                    continue
-
-            if not is_api_configured(_config) \
-                    and 'api' in (check_func.__code__.co_names + check_func.__code__.co_varnames):
+        for check in manifest[suite.__class__.__name__]['checks']:
+            if not is_api_configured(_config) and check['api']:
                 continue
 
-            if not is_rex_configured(_config) \
-                    and 'rex' in (check_func.__code__.co_varnames + check_func.__code__.co_names):
+            if not is_rex_configured(_config) and check['rex']:
                 continue
 
-            checks.append((check_func, suite))
+            checks.append((getattr(suite, check['name']), suite))
 
     return checks
 
@@ -149,7 +154,7 @@ def load_parameter_map(_suite, _check_func_name, _args):
             params = [(_args.params, json.loads(file.read()))]
 
     else:
-        path = f'parameter_maps/{_suite.__class__.__name__.lower()}/{_check_func_name}/'
+        path = os.path.join(PARAMETER_MAPS_DIR, _suite.__class__.__name__.lower(), _check_func_name, '')
         loaded_params = {}
         for path in glob.glob(f'{path}*.json'):
             with open(path) as file:
@@ -204,6 +209,163 @@ def exec_checks(_suites, _checks, _args, _result_cb, _done_cb=None):
     executor.shutdown()
 
 
+def load_renderer(_config):
+    """
+    Load the renderers configured in the [renderer] section.
+
+    :param _config: The parsed configuration.
+    :return: The render pipeline.
+    """
+    try:
+        return RenderPipeline(_config)
+    except ValueError as e:
+        print_error(f'invalid [renderer] configuration: {e}')
+        exit(1)
+
+
+def open_result_store(_config, _renderer_names):
+    """
+    Open the result store if a [store] section is configured or the diff renderer is used, which compares with it.
+
+    :param _config: The parsed configuration.
+    :param _renderer_names: The names of the renderers used.
+    :return: The result store.
+    """
+    section = _config['store'] if 'store' in _config else {}
+    store = ResultStore.inst(section.get('path', STORE_PATH), int(section.get('retention', str(RETENTION))))
+    if 'store' in _config or 'diff' in _renderer_names:
+        store.open()
+
+    return store
+
+
+def watch(_args, _config, _run):
+    """
+    Execute checks periodically until interrupted.
+
+    Before each cycle, cached API topics and remote command responses are expired after their time to live and pooled
+    database connections not used during the previous cycle are closed.
+
+    :param _args: The parsed arguments.
+    :param _config: The parsed configuration.
+    :param _run: A function executing the checks once and returning the stats collector.
+    :return: The stats collector of the last complete cycle.
+    """
+    stats_collector = StatsCollector()
+    try:
+        while True:
+            start = time.time()
+            if is_api_configured(_config):
+                ApiFetcher.inst(_config).expire()
+            if is_rex_configured(_config):
+                RemoteExecutor.inst(_config).expire()
+            ConnectionPool.inst().expire(_args.watch * 2)
+
+            stats_collector = _run()
+            time.sleep(max(_args.watch - (time.time() - start), 0))
+    except KeyboardInterrupt:
+        pass
+
+    return stats_collector
+
+
+def run_cluster(_args, _path):
+    """
+    Execute checks against a single cluster, runs in a worker process of the fleet.
+
+    :param _args: The parsed arguments.
+    :param _path: The path of the configuration file of the cluster.
+    :return: A tuple (path, cluster name, list of results, stats collector, return code).
+    """
+    results = []
+    stats_collector = StatsCollector()
+    cluster_name = _path
+    try:
+        _args.config = _path
+        config = parse_config(_args)
+        cluster_name = config['api']['addr'] if 'api' in config else _path
+
+        def collect(_result, _func, _duration=None):
+            if type(_result) == list:
+                return [collect(r, _func, _duration) for r in _result]
+            # check functions cannot be pickled, pass their metadata instead
+            results.append((_result, get_meta(_func), _duration, CheckCache.inst().is_reused(_func)))
+            stats_collector.collect(_result)
+
+        if _args.incremental:
+            CheckCache.inst().enable()
+
+        suites = load_check_suites(_args, config)
+        exec_checks(suites, find_checks(suites, _args, config), _args, collect)
+        return_code = stats_collector.return_code()
+    except SystemExit as e:
+        return_code = e.code
+    except Exception as e:
+        # report the cluster as erroneous, the results of the other clusters are rendered nevertheless
+        print_error(f'could not check cluster of {_path}: {e.__class__.__name__}: {e}')
+        return_code = 3
+    finally:
+        CheckCache.inst().close()
+        ConnectionPool.inst().close_all()
+
+    return _path, cluster_name, results, stats_collector, return_code
+
+
+def fleet(_args):
+    """
+    Execute checks against all clusters configured in a directory.
+
+    Each cluster is checked in its own worker process, i.e. with its own API fetcher and remote executor.
+    Results are rendered as soon as all checks of a cluster completed.
+
+    :param _args: The parsed arguments.
+    :return: The highest return code of all clusters.
+    """
+    paths = sorted(glob.glob(os.path.join(_args.config_dir, '*.ini')))
+    if not paths:
+        print_error('could not find any configuration file, examine argument of --config-dir')
+        exit(1)
+
+    if _args.watch or _args.serve or _args.profile or _args.trace:
+        print_error('--config-dir cannot be combined with --watch, --serve, --profile or --trace')
+        exit(1)
+
+    # renderers are configured by the first configuration file, its errors are reported by its worker
+    config = configparser.ConfigParser()
+    try:
+        config.read(paths[0])
+    except configparser.Error:
+        config = configparser.ConfigParser()
+    renderer = load_renderer(config)
+    # results of all clusters are stored by this process, i.e. the workers do not write to the store concurrently
+    store = open_result_store(config, renderer.names)
+    if store.enabled():
+        store.begin()
+    renderer.begin()
+
+    clusters = []
+    total = StatsCollector()
+    try:
+        with multiprocessing.Pool(min(_args.jobs, len(paths)), maxtasksperchild=1) as pool:
+            for path, cluster_name, results, stats_collector, return_code in pool.imap_unordered(
+                    functools.partial(run_cluster, _args), paths):
+                for result, meta, duration, reused in results:
+                    renderer.render_result(result, types.SimpleNamespace(meta=meta), _cluster_name=cluster_name)
+                    if store.enabled() and not reused:
+                        store.put(cluster_name, result, result[2] if len(result) == 3 else meta.title, duration)
+                    total.collect(result)
+                clusters.append((cluster_name, stats_collector, return_code))
+
+        renderer.render_stats(total)
+    finally:
+        # close the outputs, e.g. if a renderer raised an exception
+        renderer.close()
+        store.close()
+    print_fleet(clusters)
+
+    return max([return_code for _, _, return_code in clusters])
+
+
 def main():
     """
     Here we go. That's where all starts and all ends.
@@ -211,29 +373,105 @@ def main():
     logging.basicConfig(level=logging.INFO, format='%(asctime)-15s [%(levelname)s] %(message)s')
 
     args = parse_args()
+    if args.config_dir:
+        exit(fleet(args))
+
     config = parse_config(args)
-    suites = load_check_suites(args, config)
+    if args.cache_service:
+        if 'cache' not in config:
+            print_error('no [cache] configuration found')
+            exit(1)
+        CacheService(config['cache'].get('socket', SOCKET_PATH)).serve()
+        return
+
+    if args.trace:
+        TraceRecorder.inst().enable()
+    if args.profile:
+        ProfileRecorder.inst().enable()
+    if args.incremental:
+        CheckCache.inst().enable()
 
     if args.list:
-        print_list(suites)
+        print_list(CheckRegistry.inst().get_suites(args.suite))
         return
 
-    renderer = import_renderer(config)
-    stats_collector = StatsCollector()
+    with ProfileRecorder.inst().profile('load_suites'):
+        suites = load_check_suites(args, config)
 
-    def collect_stats(_future):
-        result = _future.result()
-        [stats_collector.collect(r) for r in result] if type(result) == list else stats_collector.collect(result)
+    exporter = None
+    if args.serve:
+        args.watch = args.watch or 60.0
+        renderer = importlib.import_module('healthcheck.result_renderers.openmetrics_renderer')
+        exporter = Exporter(args.serve).start()
+    else:
+        renderer = load_renderer(config)
 
-    def render(_result, _func):
+    if args.watch and 'ssh' in config:
+        # reuse SSH connections across cycles
+        config['ssh'].setdefault('control_persist', f'{int(args.watch * 2)}s')
+
+    store = open_result_store(config, [] if exporter else renderer.names)
+
+    cluster_name = config['api']['addr'] if 'api' in config else ''
+
+    def render(_result, _func, _duration=None):
         if type(_result) == list:
-            return [render(r, _func) for r in _result]
+            return [render(r, _func, _duration) for r in _result]
         else:
-            return renderer.render_result(_result, _func, _cluster_name=config['api']['addr'] if 'api' in config else '')
+            with ProfileRecorder.inst().profile('render'):
+                rendered = renderer.render_result(_result, _func, _cluster_name=cluster_name)
+            # reused results are unchanged, the stored ones of the previous run stay valid
+            if store.enabled() and not CheckCache.inst().is_reused(_func):
+                store.put(cluster_name, _result, _result[2] if len(_result) == 3 else get_meta(_func).title, _duration)
+            return rendered
+
+    def run():
+        start = time.time()
+        stats_collector = StatsCollector()
+        if store.enabled():
+            store.begin()
+        if not exporter:
+            renderer.begin()
+
+        def collect_stats(_future):
+            result = _future.result()
+            [stats_collector.collect(r) for r in result] if type(result) == list else stats_collector.collect(result)
+
+        try:
+            exec_checks(suites, checks, args, render, collect_stats)
+            with ProfileRecorder.inst().profile('render'):
+                if exporter:
+                    # scrapes are served from the pre-rendered buffer
+                    file = io.StringIO()
+                    renderer.render_stats(stats_collector, _file=file, _duration=time.time() - start,
+                                          _timestamp=time.time())
+                    exporter.publish(file.getvalue())
+                else:
+                    renderer.render_stats(stats_collector)
+        finally:
+            # close the outputs, e.g. if a renderer raised an exception
+            if not exporter:
+                renderer.close()
+        if store.enabled():
+            store.commit()
+
+        return stats_collector
 
     checks = find_checks(suites, args, config)
-    exec_checks(suites, checks, args, render, collect_stats)
-    renderer.render_stats(stats_collector)
+    stats_collector = watch(args, config, run) if args.watch else run()
+
+    if args.profile:
+        print_msg(f'profile summary written to {ProfileRecorder.inst().dump(args.profile)}')
+
+    if args.trace:
+        TraceRecorder.inst().dump(args.trace)
+
+    if exporter:
+        exporter.stop()
+
+    CheckCache.inst().close()
+    ResultStore.inst().close()
+    ConnectionPool.inst().close_all()
 
     logging.shutdown()
 
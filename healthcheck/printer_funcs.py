@@ -45,15 +45,14 @@ def print_list(_suites):
     """
     Print check list.
 
-    :param _suites: The list of check suites.
+    :param _suites: The list of check suites of the manifest, see `CheckRegistry.get_suites`.
     """
     checks = 0
     for suite in _suites:
-        print(f'{Color.green("Suite")}: {suite.__class__.__name__}')
-        print(f'{suite.__doc__}')
-        for check_name in filter(lambda x: x.startswith('check_'), dir(suite)):
-            check_func = getattr(suite, check_name)
-            print(' '.join([f'{Color.yellow("-")}', check_func.__doc__]))
+        print(f'{Color.green("Suite")}: {suite["name"]}')
+        print(f'{suite["doc"]}')
+        for check in suite['checks']:
+            print(' '.join([f'{Color.yellow("-")}', check['doc']]))
             checks += 1
     print(f'Total {checks} checks in {len(_suites)} suites found.')
 
@@ -107,3 +106,18 @@ def print_error(_msg, _ex=None):
             parts.append(_ex.args[0])
 
     print(Color.red(' '.join(parts)), file=sys.stderr, flush=True)
+
+
+def print_fleet(_clusters):
+    """
+    Print fleet summary.
+
+    :param _clusters: A list of tuples (cluster name, stats collector, return code).
+    """
+    print('', file=sys.stderr)
+    for cluster_name, stats, return_code in sorted(_clusters, key=lambda x: x[0]):
+        color = Color.magenta if return_code == 3 else Color.red if return_code in (1, 2) else Color.green
+        print(' '.join([color(f'[{return_code}]'), f'{cluster_name}:',
+                        f'succeeded: {stats.succeeded}, no result: {stats.no_result}, failed: {stats.failed}, '
+                        f'errors: {stats.errors}, skipped: {stats.skipped}']), file=sys.stderr, flush=True)
+    print(f'Total {len(_clusters)} clusters checked.', file=sys.stderr, flush=True)
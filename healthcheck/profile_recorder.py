@@ -0,0 +1,92 @@
+import cProfile
+import io
+import os
+import pstats
+import threading
+
+from contextlib import contextmanager
+
+
+class ProfileRecorder(object):
+    """
+    Profile Recorder class.
+
+    Profiles named sections of a run, e.g. each check, with cProfile.
+    """
+    _instance = None
+
+    def __init__(self):
+        self.enabled = False
+        self.profiles = {}
+        # profiled sections are serialized, since only one profiler may be active at a time
+        self.lock = threading.RLock()
+
+    @classmethod
+    def inst(cls):
+        """
+        Get singleton instance.
+
+        :return: The ProfileRecorder singleton.
+        """
+        if not cls._instance:
+            cls._instance = ProfileRecorder()
+
+        return cls._instance
+
+    def enable(self):
+        """
+        Enable profiling.
+        """
+        self.enabled = True
+
+    @contextmanager
+    def profile(self, _name):
+        """
+        Profile the enclosed block, repeated sections of the same name are accumulated.
+
+        :param _name: The name of the section, e.g. the check code.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        with self.lock:
+            if _name not in self.profiles:
+                self.profiles[_name] = cProfile.Profile()
+            profile = self.profiles[_name]
+
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+
+    def dump(self, _path, _top=25):
+        """
+        Write per section and aggregated stats as pstats files and a text summary into a directory.
+
+        :param _path: The path of the directory.
+        :param _top: The amount of functions in the summary, defaults to 25.
+        :return: The path of the text summary.
+        """
+        os.makedirs(_path, exist_ok=True)
+        with self.lock:
+            profiles = dict(self.profiles)
+
+        aggregate = None
+        summary = io.StringIO()
+        for name, profile in sorted(profiles.items()):
+            stats = pstats.Stats(profile, stream=summary)
+            stats.dump_stats(os.path.join(_path, f'{name}.pstats'))
+            aggregate = aggregate.add(profile) if aggregate else pstats.Stats(profile, stream=summary)
+
+        if aggregate:
+            aggregate.dump_stats(os.path.join(_path, 'aggregate.pstats'))
+            summary.write(f'top {_top} functions by cumulative time of all {len(profiles)} sections:\n')
+            aggregate.sort_stats('cumulative').print_stats(_top)
+
+        summary_path = os.path.join(_path, 'summary.txt')
+        with open(summary_path, 'w') as file:
+            file.write(summary.getvalue())
+
+        return summary_path
@@ -1,8 +1,20 @@
+import json
+import re
+import time
+
 from concurrent.futures import ThreadPoolExecutor, wait
 from threading import Lock
 
+from healthcheck.cache_service import CacheClient
 from healthcheck.common_funcs import exec_cmd
 from healthcheck.printer_funcs import print_msg, print_success, print_error
+from healthcheck.trace_recorder import TraceRecorder
+
+# time to live of cached responses in seconds, other commands are executed again in each watch cycle
+TTLS = [(r'^hostname -I$', 86400), (r'os-release', 86400), (r'rladmin info node', 600),
+        (r'transparent_hugepage', 3600), (r'overcommit_memory', 3600), (r'/proc/swaps', 3600)]
+# idempotent commands shared with concurrent invocations by the cache service, besides the ones of `TTLS`
+SHARED = [r'^sudo /opt/redislabs/bin/rladmin status']
 
 
 class RemoteExecutor(object):
@@ -18,14 +30,18 @@ class RemoteExecutor(object):
         self.targets = []
         self.ssh_user = None
         self.ssh_key = None
+        self.ssh_persist = None
         self.k8s_ns = None
         self.k8s_container = 'redis-enterprise-node'
+        self.local_rsps = {}
+        self.local_latency = .0
         self.mode = None
 
         if 'ssh' in _config:
             self.targets = list(map(lambda x: x.strip(), _config['ssh']['hosts'].split(',')))
             self.ssh_user = _config['ssh']['user']
             self.ssh_key = _config['ssh']['key']
+            self.ssh_persist = _config['ssh'].get('control_persist')
             self.mode = 'ssh'
         elif 'docker' in _config:
             self.targets = list(map(lambda x: x.strip(), _config['docker']['containers'].split(',')))
@@ -34,12 +50,23 @@ class RemoteExecutor(object):
             self.targets = list(map(lambda x: x.strip(), _config['k8s']['pods'].split(',')))
             self.k8s_ns = _config['k8s']['namespace']
             self.mode = 'k8s'
+        elif 'local' in _config:
+            self.targets = list(map(lambda x: x.strip(), _config['local']['targets'].split(',')))
+            with open(_config['local']['responses']) as file:
+                self.local_rsps = json.loads(file.read())
+            self.local_latency = float(_config['local'].get('latency', '0'))
+            self.mode = 'local'
         else:
             raise ValueError('no valid remote executor found')
 
+        # identifies the cluster, since target names like the default pod names 'rec-0' repeat across clusters
+        self.cluster = ' '.join(filter(None, [self.mode, self.k8s_ns,
+                                              _config['api']['addr'] if 'api' in _config else None]))
         self.addrs = {}
         self.locks = {}
         self.cache = {}
+        self.cached_at = {}
+        self.cache_client = CacheClient.inst(_config)
         self.connected = None
 
     @classmethod
@@ -73,6 +100,16 @@ class RemoteExecutor(object):
                 self.connected = False
         print_msg('')
 
+    def expire(self):
+        """
+        Expire cached responses after their time to live, see `TTLS`.
+        """
+        now = time.time()
+        for (target, cmd), cached_at in list(self.cached_at.items()):
+            if now - cached_at >= next((ttl for pattern, ttl in TTLS if re.search(pattern, cmd)), 0):
+                del self.cache[target][cmd]
+                del self.cached_at[(target, cmd)]
+
     def get_addr(self, _hostname):
         """
         Get internal address of node.
@@ -101,29 +138,31 @@ class RemoteExecutor(object):
         """
         return self.targets
 
-    def exec_uni(self, _cmd, _target):
+    def exec_uni(self, _cmd, _target, _cacheable=True):
         """
         Execute a remote command.
 
         :param _cmd: The command to execute.
         :param _target: The remote machine.
+        :param _cacheable: If the response may be cached, defaults to True, pass False for probes and scripts.
         :return: The result.
         :raise Exception: If an error occurred.
         """
-        return self._exec(_cmd, _target)
+        return self._exec(_cmd, _target, _cacheable)
 
-    def exec_multi(self, _cmd_targets):
+    def exec_multi(self, _cmd_targets, _cacheable=True):
         """
         Execute multiple remote commands.
 
         :param _cmd_targets: A list of (command, target).
+        :param _cacheable: If the responses may be cached, defaults to True, pass False for probes and scripts.
         :return: The result.
         :raise Exception: If an error occurred.
         """
         with ThreadPoolExecutor(max_workers=len(_cmd_targets)) as e:
             futures = []
             for cmd, target in _cmd_targets:
-                future = e.submit(self._exec, cmd, target)
+                future = e.submit(self._exec, cmd, target, _cacheable)
                 future.target = target
                 future.cmd = cmd
                 futures.append(future)
@@ -132,18 +171,19 @@ class RemoteExecutor(object):
 
             return done
 
-    def exec_broad(self, _cmd):
+    def exec_broad(self, _cmd, _cacheable=True):
         """
         Execute a remote command on all targets.
 
         :param _cmd: The command to execute.
+        :param _cacheable: If the responses may be cached, defaults to True, pass False for probes and scripts.
         :return: The results.
         :raise Exception: If an error occurred.
         """
         with ThreadPoolExecutor(max_workers=len(self.targets)) as e:
             futures = []
             for target in self.targets:
-                future = e.submit(self.exec_uni, _cmd, target)
+                future = e.submit(self.exec_uni, _cmd, target, _cacheable)
                 future.target = target
                 future.cmd = _cmd
                 futures.append(future)
@@ -152,34 +192,53 @@ class RemoteExecutor(object):
 
             return done
 
-    def _exec(self, _cmd, _target):
+    def _exec(self, _cmd, _target, _cacheable=True):
         """
         Execute a remote command.
 
         :param _cmd: The command to execute.
         :param _target: The remote machine.
+        :param _cacheable: If the response may be cached, defaults to True.
         :return: The response.
         :raise Exception: If an error occurred.
         """
         # lookup from cache
-        if _target in self.cache and _cmd in self.cache[_target]:
+        if _cacheable and _target in self.cache and _cmd in self.cache[_target]:
+            TraceRecorder.inst().instant('cache hit', 'rex', target=_target, cmd=_cmd)
             return self.cache[_target][_cmd]
 
         # build command
-        cmd = self._build_cmd(_target, _cmd)
+        cmd = self._build_cmd(_target, _cmd) if self.mode != 'local' else None
 
         # create lock if not existent
         if _target not in self.locks:
             self.locks[_target] = Lock()
 
         # execute command
-        with self.locks[_target]:
-            rsp = exec_cmd(cmd)
+        tracer = TraceRecorder.inst()
+        with tracer.span('lock wait', 'wait', target=_target, cmd=_cmd):
+            self.locks[_target].acquire()
+        try:
+            # consult the cache service first, for idempotent commands only
+            ttl = next((ttl for pattern, ttl in TTLS if re.search(pattern, _cmd)), None)
+            shared = _cacheable and (ttl is not None or any(re.search(pattern, _cmd) for pattern in SHARED))
+            with tracer.span(_cmd, 'rex', target=_target):
+                if shared:
+                    rsp = self.cache_client.fetch(f'rex {self.cluster} {_target} {_cmd}',
+                                                  lambda: exec_cmd(cmd) if cmd else self._respond(_target, _cmd), ttl)
+                else:
+                    rsp = exec_cmd(cmd) if cmd else self._respond(_target, _cmd)
+        finally:
+            self.locks[_target].release()
+
+        if not _cacheable:
+            return rsp
 
         # put into cache
         if _target not in self.cache:
             self.cache[_target] = {}
         self.cache[_target][_cmd] = rsp
+        self.cached_at[(_target, _cmd)] = time.time()
 
         return rsp
 
@@ -199,6 +258,10 @@ class RemoteExecutor(object):
                      '--', _cmd.replace('sudo ', '')]
         elif self.mode == 'ssh':
             parts = ['ssh']
+            # keep a master connection per host open, so following commands skip the handshake
+            if self.ssh_persist:
+                parts.append('-o ControlMaster=auto -o ControlPath=~/.ssh/hc-%r@%h:%p -o ControlPersist={}'.format(
+                    self.ssh_persist))
             if self.ssh_key:
                 parts.append('-i {}'.format(self.ssh_key))
             if self.ssh_user:
@@ -210,3 +273,22 @@ class RemoteExecutor(object):
             raise Exception('unknown REX mode')
 
         return ' '.join(parts)
+
+    def _respond(self, _target, _cmd):
+        """
+        Respond with a canned response, used for benchmarks and tests without a cluster.
+
+        The responses file maps targets (or '*' for all targets) to a dict of regular expressions and responses.
+
+        :param _target: The target machine.
+        :param _cmd: The command to execute.
+        :return: The canned response.
+        :raise Exception: If no canned response matches.
+        """
+        time.sleep(self.local_latency)
+        for target in [_target, '*']:
+            for pattern, rsp in self.local_rsps.get(target, {}).items():
+                if re.search(pattern, _cmd):
+                    return rsp
+
+        raise Exception(f'no canned response for `{_cmd}` on {_target}')
@@ -0,0 +1,107 @@
+"""
+Measure the network bandwidth to a peer node in two phases, so every receiver listens before any sender connects.
+
+Runs with the Python interpreter of the node, i.e. Python 2 or 3, and uses the standard library only.
+Usage:
+  `python - listen <PORT> <SECONDS> <BUFFER SIZE>` binds the port and forks a receiver, which accepts one stream,
+  prints one JSON object with 'listening' or 'error'.
+  `python - send <PORT> <PEER ADDRESS> <SECONDS> <BUFFER SIZE>` streams to the receiver of the peer,
+  prints one JSON object with the MB/s 'sent' until the peer has read everything or 'error'.
+"""
+from __future__ import division, print_function
+
+import json
+import os
+import socket
+import sys
+import time
+
+MAX_SECONDS = 10.0
+CONNECT_TIMEOUT = 5.0
+# covers the senders waiting for other remote commands on their node
+ACCEPT_TIMEOUT = 60.0
+CHUNK = 1 << 20
+
+
+def receive(_server, _seconds):
+    _server.settimeout(ACCEPT_TIMEOUT)
+    try:
+        conn, _ = _server.accept()
+    except socket.timeout:
+        return
+    finally:
+        _server.close()
+    conn.settimeout(_seconds + CONNECT_TIMEOUT)
+
+    view = memoryview(bytearray(CHUNK))
+    try:
+        while conn.recv_into(view):
+            pass
+    finally:
+        conn.close()
+
+
+def listen(_port, _seconds, _buffer):
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, _buffer)
+        server.bind(('', _port))
+        server.listen(1)
+    except socket.error as e:
+        server.close()
+        return {'error': 'bind {}: {}'.format(_port, e)}
+
+    # detach the receiver, so the remote command returns while it is listening
+    if os.fork():
+        server.close()
+        return {'listening': True}
+
+    os.setsid()
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in range(3):
+        os.dup2(devnull, fd)
+    try:
+        receive(server, _seconds)
+    finally:
+        os._exit(0)
+
+
+def send(_addr, _port, _seconds, _buffer):
+    try:
+        sock = socket.create_connection((_addr, _port), timeout=CONNECT_TIMEOUT)
+    except socket.error as e:
+        return {'error': 'connect {}: {}'.format(_port, e)}
+
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, _buffer)
+        sock.settimeout(_seconds + CONNECT_TIMEOUT)
+        payload = b'\0' * CHUNK
+        total = 0
+        start = time.time()
+        while time.time() - start < _seconds:
+            sock.sendall(payload)
+            total += CHUNK
+        sock.shutdown(socket.SHUT_WR)
+        # wait until the peer has read everything
+        sock.recv(1)
+        elapsed = time.time() - start
+    except socket.error as e:
+        return {'error': 'send {}: {}'.format(_port, e)}
+    finally:
+        sock.close()
+
+    return {'sent': total / elapsed / 1e6}
+
+
+def main():
+    if sys.argv[1] == 'listen':
+        result = listen(int(sys.argv[2]), min(float(sys.argv[3]), MAX_SECONDS), int(sys.argv[4]))
+    else:
+        result = send(sys.argv[3], int(sys.argv[2]), min(float(sys.argv[4]), MAX_SECONDS), int(sys.argv[5]))
+
+    print(json.dumps(result, separators=(',', ':')))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Scan log files for patterns, starting at the byte offsets of the last scan.
+
+Runs with the Python interpreter of the node, i.e. Python 2 or 3, and uses the standard library only.
+Usage: `python - <BASE64 JSON>` with 'glob', 'patterns', 'offsets', 'last' and 'max_bytes',
+prints one JSON object mapping files to inode, offset, counts per pattern, skipped bytes and the last matches.
+"""
+from __future__ import division, print_function
+
+import base64
+import collections
+import glob
+import json
+import os
+import re
+import sys
+
+MAX_LINE = 500
+
+
+def scan(_path, _state, _patterns, _last, _max_bytes):
+    stat = os.stat(_path)
+    offset = _state.get('offset', 0)
+    # the file was rotated or truncated
+    if _state.get('inode') != stat.st_ino or offset > stat.st_size:
+        offset = 0
+    # bound the scan, skip to the tail of too many new bytes
+    skipped = max(stat.st_size - offset - _max_bytes, 0)
+    offset += skipped
+
+    counts = [0] * len(_patterns)
+    matches = collections.deque(maxlen=_last)
+    with open(_path, 'rb') as file:
+        file.seek(offset)
+        if skipped:
+            offset += len(file.readline())
+        while offset < stat.st_size:
+            line = file.readline(stat.st_size - offset)
+            # an incomplete line is scanned next time
+            if not line.endswith(b'\n'):
+                break
+            offset += len(line)
+            line = line.decode('utf-8', 'replace').rstrip()
+            matched = False
+            for i, pattern in enumerate(_patterns):
+                if pattern.search(line):
+                    counts[i] += 1
+                    matched = True
+            if matched:
+                matches.append(line[:MAX_LINE])
+
+    return {'inode': stat.st_ino, 'offset': offset, 'skipped': skipped, 'matches': list(matches),
+            'counts': dict((pattern.pattern, count) for pattern, count in zip(_patterns, counts))}
+
+
+def main():
+    args = json.loads(base64.b64decode(sys.argv[1]).decode())
+    patterns = [re.compile(pattern, re.IGNORECASE) for pattern in args['patterns']]
+    results = {}
+    for path in sorted(glob.glob(args['glob'])):
+        try:
+            results[path] = scan(path, args['offsets'].get(path, {}), patterns, args['last'], args['max_bytes'])
+        except (IOError, OSError) as e:
+            results[path] = {'error': str(e)}
+
+    print(json.dumps(results, separators=(',', ':')))
+
+
+if __name__ == '__main__':
+    main()
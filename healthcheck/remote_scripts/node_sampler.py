@@ -0,0 +1,110 @@
+"""
+Sample CPU, memory, pressure stall and per-process CPU of a node at sub-second intervals.
+
+Runs with the Python interpreter of the node, i.e. Python 2 or 3, and uses the standard library only.
+Usage: `python - <DURATION> <INTERVAL> [<PROCESS NAME> ...]`, prints one JSON object.
+"""
+from __future__ import division, print_function
+
+import json
+import os
+import sys
+import time
+
+MAX_DURATION = 10.0
+MIN_INTERVAL = .05
+PRESSURES = ('cpu', 'memory', 'io')
+
+
+def read_cpu():
+    with open('/proc/stat') as file:
+        values = [int(x) for x in file.readline().split()[1:]]
+    # user nice system idle iowait irq softirq steal
+    values += [0] * (8 - len(values))
+    return sum(values[:8]), values[3] + values[4], values[4], values[7]
+
+
+def read_mem_available():
+    with open('/proc/meminfo') as file:
+        for line in file:
+            if line.startswith('MemAvailable:'):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def read_pressures():
+    totals = {}
+    for name in PRESSURES:
+        try:
+            with open('/proc/pressure/' + name) as file:
+                some = file.readline().split()
+        except (IOError, OSError):
+            continue
+        totals[name] = int(some[-1].split('=')[1])
+    return totals
+
+
+def find_procs(_names):
+    procs = {}
+    for pid in filter(str.isdigit, os.listdir('/proc')):
+        try:
+            with open('/proc/%s/comm' % pid) as file:
+                name = file.read().strip()
+        except (IOError, OSError):
+            continue
+        if name in _names:
+            procs[pid] = name
+    return procs
+
+
+def read_proc_ticks(_pid):
+    try:
+        with open('/proc/%s/stat' % _pid) as file:
+            fields = file.read().rsplit(')', 1)[1].split()
+    except (IOError, OSError):
+        return None
+    # utime and stime are the 14th and 15th fields, i.e. after pid and comm
+    return int(fields[11]) + int(fields[12])
+
+
+def main():
+    duration = min(float(sys.argv[1]) if len(sys.argv) > 1 else 2.0, MAX_DURATION)
+    interval = max(float(sys.argv[2]) if len(sys.argv) > 2 else .25, MIN_INTERVAL)
+    names = sys.argv[3:] or ['redis-server', 'dmcproxy']
+
+    procs = find_procs(names)
+    start_ticks = dict((pid, read_proc_ticks(pid)) for pid in procs)
+    samples = {'busy': [], 'iowait': [], 'steal': [], 'mem_avail': []}
+    stalls = dict((name, []) for name in PRESSURES)
+
+    start = time.time()
+    last_cpu, last_psi, last_time = read_cpu(), read_pressures(), start
+    while time.time() - start < duration:
+        time.sleep(interval)
+        cpu, psi, now = read_cpu(), read_pressures(), time.time()
+        total = (cpu[0] - last_cpu[0]) or 1
+        # per mille of CPU time
+        samples['busy'].append(int(1000 * (total - (cpu[1] - last_cpu[1])) / total))
+        samples['iowait'].append(int(1000 * (cpu[2] - last_cpu[2]) / total))
+        samples['steal'].append(int(1000 * (cpu[3] - last_cpu[3]) / total))
+        samples['mem_avail'].append(read_mem_available() >> 20)
+        # per mille of wall time with some tasks stalled
+        for name, value in psi.items():
+            stalls[name].append(int((value - last_psi.get(name, value)) / ((now - last_time) * 1000)))
+        last_cpu, last_psi, last_time = cpu, psi, now
+
+    elapsed = (time.time() - start) * os.sysconf('SC_CLK_TCK')
+    usages = []
+    for pid, name in procs.items():
+        ticks = read_proc_ticks(pid)
+        if ticks is not None and start_ticks[pid] is not None:
+            usages.append(('%s:%s' % (name, pid), int(1000 * (ticks - start_ticks[pid]) / elapsed)))
+
+    samples['psi'] = dict((name, values) for name, values in stalls.items() if values)
+    samples['procs'] = sorted(usages, key=lambda x: -x[1])[:5]
+    samples['cpus'] = os.sysconf('SC_NPROCESSORS_ONLN')
+    print(json.dumps(samples, separators=(',', ':')))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Measure sequential write, fsync latency and random read of the storage of paths.
+
+Runs with the Python interpreter of the node, i.e. Python 2 or 3, and uses the standard library only.
+Writes and reads a temporary file with direct I/O, falls back to buffered I/O if unsupported, e.g. on tmpfs.
+Usage: `python - <SIZE MB> <SECONDS> <PATH> [<PATH> ...]`, prints one JSON object mapping paths to results.
+"""
+from __future__ import division, print_function
+
+import errno
+import json
+import mmap
+import os
+import random
+import sys
+import tempfile
+import time
+
+MAX_SIZE_MB = 256
+MAX_SECONDS = 5.0
+BLOCK = 1 << 20
+PAGE = 4096
+
+
+def open_direct(_path, _flags):
+    try:
+        return os.open(_path, _flags | getattr(os, 'O_DIRECT', 0)), True
+    except OSError as e:
+        if e.errno != errno.EINVAL:
+            raise
+        return os.open(_path, _flags), False
+
+
+def write_sequential(_path, _size, _buf):
+    fd, direct = open_direct(_path, os.O_WRONLY)
+    file = os.fdopen(fd, 'wb', 0)
+    start = time.time()
+    try:
+        for _ in range(_size // BLOCK):
+            file.write(_buf)
+        os.fsync(fd)
+    finally:
+        file.close()
+    return _size / (time.time() - start) / 1e6, direct
+
+
+def fsync_latencies(_path, _seconds, _buf):
+    fd = os.open(_path, os.O_WRONLY)
+    latencies = []
+    deadline = time.time() + _seconds
+    try:
+        while time.time() < deadline:
+            os.lseek(fd, 0, os.SEEK_SET)
+            start = time.time()
+            os.write(fd, _buf[:PAGE])
+            os.fsync(fd)
+            latencies.append(time.time() - start)
+    finally:
+        os.close(fd)
+    return sorted(latencies)
+
+
+def read_random(_path, _size, _seconds):
+    fd, direct = open_direct(_path, os.O_RDONLY)
+    file = os.fdopen(fd, 'rb', 0)
+    page = mmap.mmap(-1, PAGE)
+    count = 0
+    start = time.time()
+    try:
+        while time.time() - start < _seconds:
+            file.seek(random.randrange(_size // PAGE) * PAGE)
+            file.readinto(page)
+            count += 1
+    finally:
+        file.close()
+        page.close()
+    return count / (time.time() - start), direct
+
+
+def probe(_path, _size, _seconds):
+    fd, name = tempfile.mkstemp(prefix='.hc_storage_probe_', dir=_path)
+    os.close(fd)
+    # anonymous mmaps are page aligned, as required by direct I/O
+    buf = mmap.mmap(-1, BLOCK)
+    buf.write(os.urandom(BLOCK))
+    try:
+        write_mbps, write_direct = write_sequential(name, _size, buf)
+        latencies = fsync_latencies(name, _seconds / 2, buf)
+        iops, read_direct = read_random(name, _size, _seconds / 2)
+    finally:
+        os.remove(name)
+        buf.close()
+
+    p99 = latencies[min(int(len(latencies) * .99), len(latencies) - 1)] if latencies else None
+    return {'write_mbps': write_mbps, 'read_iops': iops, 'fsync_p99_ms': p99 * 1000 if p99 is not None else None,
+            'fsyncs': len(latencies), 'direct': write_direct and read_direct}
+
+
+def main():
+    # at least one block, i.e. one page to read
+    size = max(min(int(sys.argv[1]), MAX_SIZE_MB), 1) * (1 << 20)
+    seconds = min(float(sys.argv[2]), MAX_SECONDS)
+    results = {}
+    for path in sys.argv[3:]:
+        try:
+            results[path] = probe(path, size, seconds)
+        except (IOError, OSError) as e:
+            results[path] = {'error': str(e)}
+
+    print(json.dumps(results, separators=(',', ':')))
+
+
+if __name__ == '__main__':
+    main()
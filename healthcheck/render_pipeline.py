@@ -0,0 +1,115 @@
+import importlib
+import sys
+
+# amount of characters buffered per output before a write
+BUFFER_SIZE = 64 * 1024
+
+
+class BufferedSink(object):
+    """
+    Buffered Sink class.
+
+    Collects the output of a renderer and writes it to a stream in large chunks.
+    """
+
+    def __init__(self, _stream):
+        """
+        :param _stream: The stream to write to, e.g. `sys.stdout` or an opened file.
+        """
+        self.stream = _stream
+        self.chunks = []
+        self.size = 0
+
+    def write(self, _text):
+        """
+        Buffer text, writes the buffer if it exceeds `BUFFER_SIZE`.
+
+        :param _text: The text.
+        """
+        self.chunks.append(_text)
+        self.size += len(_text)
+        if self.size >= BUFFER_SIZE:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the buffer to the stream.
+        """
+        if self.chunks:
+            self.stream.write(''.join(self.chunks))
+            self.chunks = []
+            self.size = 0
+        self.stream.flush()
+
+
+class RenderPipeline(object):
+    """
+    Render Pipeline class.
+
+    Renders each result with all configured renderers, each into its own buffered output with its own state.
+    """
+
+    def __init__(self, _config):
+        """
+        :param _config: The parsed configuration, renderers are configured in the [renderer] section by a CSV list of
+        `module` names, defaults to 'basic', and an optional `<module>_file` per renderer, defaults to stdout.
+        """
+        section = _config['renderer'] if 'renderer' in _config else {}
+        self.names = [name.strip() for name in section.get('module', 'basic').split(',')]
+        # buffered outputs of several renderers on stdout would interleave
+        stdout_names = [name for name in self.names if not section.get(f'{name}_file')]
+        if len(stdout_names) > 1:
+            raise ValueError(f'only one renderer can output to stdout, configure a file for all but one of '
+                             f'{", ".join(stdout_names)}, e.g. {stdout_names[-1]}_file')
+
+        self.outputs = [(importlib.import_module(f'healthcheck.result_renderers.{name}_renderer'),
+                         section.get(f'{name}_file')) for name in self.names]
+        self.sinks = []
+
+    def begin(self):
+        """
+        Begin a run, opens all outputs and resets the state of all renderers.
+        """
+        self.sinks = []
+        try:
+            for module, path in self.outputs:
+                self.sinks.append((module, BufferedSink(open(path, 'w') if path else sys.stdout), {}))
+        except OSError:
+            self.close()
+            raise
+
+    def render_result(self, _result, _func, **_kwargs):
+        """
+        Render a result with all renderers.
+
+        :param _result: The result.
+        :param _func: The check function executed.
+        :param _kwargs: Keyword arguments passed to the renderers, e.g. `_cluster_name`.
+        """
+        for module, sink, state in self.sinks:
+            module.render_result(_result, _func, _file=sink, _state=state, **_kwargs)
+
+    def render_stats(self, _stats, **_kwargs):
+        """
+        Render collected statistics with all renderers and close all outputs.
+
+        :param _stats: A stats collector.
+        :param _kwargs: Keyword arguments passed to the renderers.
+        """
+        try:
+            for module, sink, state in self.sinks:
+                module.render_stats(_stats, _file=sink, _state=state, **_kwargs)
+        finally:
+            self.close()
+
+    def close(self):
+        """
+        Flush and close all outputs, e.g. if a renderer raised an exception during the run.
+        """
+        sinks, self.sinks = self.sinks, []
+        for _, sink, _ in sinks:
+            try:
+                sink.flush()
+            finally:
+                if sink.stream is not sys.stdout:
+                    sink.stream.close()
@@ -0,0 +1,312 @@
+import socket
+import threading
+import time
+
+from contextlib import contextmanager
+
+NOT_READY = object()
+
+
+class RespError(Exception):
+    """
+    RESP Error class.
+
+    An error reply of a Redis server, e.g. '-NOAUTH Authentication required.'.
+    """
+    pass
+
+
+def encode_command(_args):
+    """
+    Encode a command as RESP array of bulk strings.
+
+    :param _args: The arguments of the command, e.g. ('INFO', 'memory').
+    :return: The encoded command.
+    """
+    parts = [b'*%d\r\n' % len(_args)]
+    for arg in _args:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode()
+        parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+
+    return b''.join(parts)
+
+
+class RespPush(list):
+    """
+    RESP Push class.
+
+    An out-of-band RESP3 push frame, e.g. an invalidation message, which is not a reply to a command.
+    """
+    pass
+
+
+class RespParser(object):
+    """
+    RESP Parser class.
+
+    Incrementally parses RESP2 and RESP3 replies out of fed data.
+    Bulk strings are decoded as UTF-8, maps as dicts, sets as lists, error replies are returned as RespError.
+    RESP3 push frames are skipped, since they are no replies.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.pos = 0
+
+    def feed(self, _data):
+        """
+        Feed received data.
+
+        :param _data: The received bytes.
+        """
+        if self.pos:
+            del self.buffer[:self.pos]
+            self.pos = 0
+        self.buffer.extend(_data)
+
+    def gets(self):
+        """
+        Get the next complete reply.
+
+        :return: The reply or NOT_READY if more data is needed.
+        """
+        while True:
+            start = self.pos
+            try:
+                reply = self._parse()
+            except IndexError:
+                self.pos = start
+                return NOT_READY
+            if not isinstance(reply, RespPush):
+                return reply
+
+    def _line(self):
+        end = self.buffer.find(b'\r\n', self.pos)
+        if end < 0:
+            raise IndexError()
+        line = bytes(self.buffer[self.pos:end])
+        self.pos = end + 2
+
+        return line
+
+    def _blob(self, _size):
+        if len(self.buffer) < self.pos + _size + 2:
+            raise IndexError()
+        blob = bytes(self.buffer[self.pos:self.pos + _size])
+        self.pos += _size + 2
+
+        return blob
+
+    def _parse(self):
+        line = self._line()
+        kind, rest = line[:1], line[1:]
+        if kind == b'+':
+            return rest.decode(errors='replace')
+        if kind == b'-':
+            return RespError(rest.decode(errors='replace'))
+        if kind == b':':
+            return int(rest)
+        if kind in (b'$', b'!', b'='):
+            if rest == b'-1':
+                return None
+            blob = self._blob(int(rest)).decode(errors='replace')
+            if kind == b'!':
+                return RespError(blob)
+            return blob[4:] if kind == b'=' else blob
+        if kind in (b'*', b'~'):
+            if rest == b'-1':
+                return None
+            return [self._parse() for _ in range(int(rest))]
+        if kind == b'>':
+            return RespPush(self._parse() for _ in range(int(rest)))
+        if kind == b'%':
+            return {self._hashable(self._parse()): self._parse() for _ in range(int(rest))}
+        if kind == b'|':
+            # attributes are skipped
+            for _ in range(int(rest) * 2):
+                self._parse()
+            return self._parse()
+        if kind == b'_':
+            return None
+        if kind == b'#':
+            return rest == b't'
+        if kind == b',':
+            return float(rest)
+        if kind == b'(':
+            return int(rest)
+
+        raise ValueError(f'invalid RESP type {kind}')
+
+    @staticmethod
+    def _hashable(_value):
+        return tuple(_value) if isinstance(_value, list) else _value
+
+
+class RespConnection(object):
+    """
+    RESP Connection class.
+
+    A connection to a Redis database with timeouts and pipelining.
+    """
+
+    def __init__(self, _host, _port, _auth=None, _timeout=1.0):
+        """
+        :param _host: A Redis database host.
+        :param _port: A Redis database port.
+        :param _auth: An optional Redis database password.
+        :param _timeout: The timeout of connect and each request in seconds, defaults to 1.
+        :raise RespError: If the password was not accepted.
+        """
+        self.addr = (_host, _port)
+        self.parser = RespParser()
+        self.sock = socket.create_connection(self.addr, timeout=_timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.broken = False
+        if _auth:
+            try:
+                self.execute('AUTH', _auth)
+            except Exception:
+                self.close()
+                raise
+
+    def execute(self, *_args):
+        """
+        Execute a command.
+
+        :param _args: The arguments of the command, e.g. ('INFO', 'memory').
+        :return: The reply.
+        :raise RespError: If an error reply was received.
+        """
+        reply = self.pipeline([_args])[0]
+        if isinstance(reply, RespError):
+            raise reply
+
+        return reply
+
+    def pipeline(self, _commands):
+        """
+        Execute many commands at once.
+
+        :param _commands: A list of argument tuples.
+        :return: A list of replies, error replies as RespError.
+        :raise Exception: If sending or receiving failed, the connection is broken then.
+        """
+        try:
+            self.sock.sendall(b''.join(map(encode_command, _commands)))
+            return [self._read() for _ in _commands]
+        except Exception:
+            self.broken = True
+            raise
+
+    def close(self):
+        """
+        Close the connection.
+        """
+        self.broken = True
+        self.sock.close()
+
+    def _read(self):
+        """
+        Read the next reply.
+
+        :return: The reply.
+        :raise ConnectionError: If the connection was closed by the server.
+        """
+        reply = self.parser.gets()
+        while reply is NOT_READY:
+            data = self.sock.recv(65536)
+            if not data:
+                raise ConnectionError(f'connection to {self.addr[0]}:{self.addr[1]} closed')
+            self.parser.feed(data)
+            reply = self.parser.gets()
+
+        return reply
+
+
+class ConnectionPool(object):
+    """
+    Connection Pool class.
+
+    Keeps idle connections to Redis databases, keyed by endpoint and password.
+    Idle connections are closed by `expire` or `close_all`, e.g. per watch cycle and on exit.
+    """
+    _instance = None
+
+    def __init__(self, _max_idle=4):
+        """
+        :param _max_idle: The maximum amount of idle connections per endpoint, defaults to 4.
+        """
+        self.max_idle = _max_idle
+        self.idle = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def inst(cls):
+        """
+        Get singleton instance.
+
+        :return: The ConnectionPool singleton.
+        """
+        if not cls._instance:
+            cls._instance = ConnectionPool()
+
+        return cls._instance
+
+    @contextmanager
+    def connection(self, _host, _port, _auth=None, _timeout=1.0):
+        """
+        Get a connection, either an idle one or a new one, and put it back afterwards.
+
+        :param _host: A Redis database host.
+        :param _port: A Redis database port.
+        :param _auth: An optional Redis database password.
+        :param _timeout: The timeout of connect and each request in seconds, defaults to 1.
+        """
+        key = (_host, _port, _auth)
+        with self.lock:
+            conns = self.idle.get(key)
+            conn = conns.pop() if conns else None
+
+        if conn:
+            conn.sock.settimeout(_timeout)
+        else:
+            conn = RespConnection(_host, _port, _auth, _timeout)
+
+        try:
+            yield conn
+        finally:
+            with self.lock:
+                conns = self.idle.setdefault(key, [])
+                if not conn.broken and len(conns) < self.max_idle:
+                    conn.idle_since = time.time()
+                    conns.append(conn)
+                    conn = None
+            if conn:
+                conn.close()
+
+    def expire(self, _max_idle_seconds):
+        """
+        Close connections which were idle for longer than a given time, e.g. to databases deleted meanwhile.
+
+        :param _max_idle_seconds: The maximum idle time in seconds.
+        """
+        deadline = time.time() - _max_idle_seconds
+        with self.lock:
+            expired = [conn for conns in self.idle.values() for conn in conns if conn.idle_since < deadline]
+            self.idle = {key: [conn for conn in conns if conn.idle_since >= deadline]
+                         for key, conns in self.idle.items()}
+
+        for conn in expired:
+            conn.close()
+
+    def close_all(self):
+        """
+        Close all idle connections.
+        """
+        with self.lock:
+            conns = [conn for conns in self.idle.values() for conn in conns]
+            self.idle = {}
+
+        for conn in conns:
+            conn.close()
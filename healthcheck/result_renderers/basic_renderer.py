@@ -1,5 +1,6 @@
-import re
+import sys
 
+from healthcheck.check_registry import get_meta
 from healthcheck.printer_funcs import Color
 
 
@@ -10,7 +11,9 @@ def render_result(_result, _func, *_args, **_kwargs):
     :param _result: The result.
     :param _func: The check function executed.
     """
-    doc = (_result[2] if len(_result) == 3 else _func.__doc__).split('\n')[0]
+    file = _kwargs.get('_file', sys.stdout)
+    meta = get_meta(_func)
+    doc = _result[2] if len(_result) == 3 else meta.title
     remedy = None
     if _result[0] == '':
         to_print = ['[ ]', doc, '[SKIPPED]']
@@ -18,8 +21,7 @@ def render_result(_result, _func, *_args, **_kwargs):
         to_print = [Color.green('[+]'), doc, Color.green('[SUCCEEDED]')]
     elif _result[0] is False:
         to_print = [Color.red('[-]'), doc, Color.red('[FAILED]')]
-        doc = (_result[2] if len(_result) == 3 else _func.__doc__)
-        remedy = re.findall(r'Remedy: (.*)', doc, re.MULTILINE)
+        remedy = meta.remedy
     elif _result[0] is None:
         to_print = [Color.yellow('[~]'), doc, Color.yellow('[NO RESULT]')]
     elif _result[0] is Exception:
@@ -29,23 +31,24 @@ def render_result(_result, _func, *_args, **_kwargs):
 
     to_print.append(', '.join([str(k) + ': ' + str(v) for k, v in _result[1].items()]))
     if remedy:
-        to_print.append(' '.join([Color.cyan('Remedy:'), remedy[0]]))
-        print('{} {} {} {} {}'.format(*to_print))
+        to_print.append(' '.join([Color.cyan('Remedy:'), remedy]))
+        print('{} {} {} {} {}'.format(*to_print), file=file)
     else:
-        print('{} {} {} {}'.format(*to_print))
+        print('{} {} {} {}'.format(*to_print), file=file)
 
 
-def render_stats(_stats):
+def render_stats(_stats, *_args, **_kwargs):
     """
     Render collected statistics.
 
     :param _stats: A stats collector.
     """
-    print('')
+    file = _kwargs.get('_file', sys.stdout)
+    print('', file=file)
     print('total checks run: {}'.format(
-        sum([_stats.succeeded, _stats.no_result, _stats.failed, _stats.errors, _stats.skipped])))
-    print(f'- {Color.green("succeeded")}: {_stats.succeeded}')
-    print(f'- {Color.yellow("no result")}: {_stats.no_result}')
-    print(f'- {Color.red("failed")}: {_stats.failed}')
-    print(f'- {Color.magenta("errors")}: {_stats.errors}')
-    print(f'- skipped: {_stats.skipped}')
+        sum([_stats.succeeded, _stats.no_result, _stats.failed, _stats.errors, _stats.skipped])), file=file)
+    print(f'- {Color.green("succeeded")}: {_stats.succeeded}', file=file)
+    print(f'- {Color.yellow("no result")}: {_stats.no_result}', file=file)
+    print(f'- {Color.red("failed")}: {_stats.failed}', file=file)
+    print(f'- {Color.magenta("errors")}: {_stats.errors}', file=file)
+    print(f'- skipped: {_stats.skipped}', file=file)
@@ -0,0 +1,91 @@
+import json
+import re
+import sys
+
+from healthcheck.check_registry import get_meta
+from healthcheck.printer_funcs import Color
+from healthcheck.result_store import ResultStore, STATUSES
+
+# relative change of numeric values considered a change
+TOLERANCE = .1
+# standalone numbers, i.e. not part of versions, dates, times or names
+NUMBER = r'(?<![\w.:-])-?\d+(?:\.\d+)?(?![\w.:-])'
+COLORS = {'SKIPPED': str, 'SUCCEEDED': Color.green, 'FAILED': Color.red, 'NO RESULT': Color.yellow,
+          'ERROR': Color.magenta}
+
+# render state of calls without an own state
+STATE = {}
+
+
+def is_changed(_value, _previous):
+    """
+    Compare an info value with its previous one, numbers are compared within `TOLERANCE`.
+
+    :param _value: The info value.
+    :param _previous: The previous info value.
+    :return: Boolean
+    """
+    if isinstance(_value, dict) and isinstance(_previous, dict):
+        return _value.keys() != _previous.keys() or any(is_changed(v, _previous[k]) for k, v in _value.items())
+
+    if type(_value) in (int, float) and type(_previous) in (int, float):
+        return abs(_value - _previous) > TOLERANCE * max(abs(_value), abs(_previous))
+
+    # compare numbers within strings of the same shape, e.g. '1.0/1.2/1.5/0.1 GB'
+    if isinstance(_value, str) and isinstance(_previous, str) and \
+            re.sub(NUMBER, '#', _value) == re.sub(NUMBER, '#', _previous):
+        return any(is_changed(float(a), float(b)) for a, b in zip(re.findall(NUMBER, _value),
+                                                                   re.findall(NUMBER, _previous)))
+
+    return _value != _previous
+
+
+def render_result(_result, _func, *_args, **_kwargs):
+    """
+    Render result if its status or info changed since it was last rendered, i.e. against its baseline, so slow drifts
+    are rendered as soon as they exceed `TOLERANCE` in total.
+
+    :param _result: The result.
+    :param _func: The check function executed.
+    """
+    file = _kwargs.get('_file', sys.stdout)
+    state = _kwargs.get('_state', STATE)
+    desc = _result[2] if len(_result) == 3 else get_meta(_func).title
+    if _result[0] not in STATUSES:
+        raise NotImplementedError()
+
+    status = STATUSES[_result[0]]
+    # compare with the JSON representation of the stored info
+    info = json.loads(json.dumps(_result[1], default=str))
+    store = ResultStore.inst()
+    cluster_name = _kwargs.get('_cluster_name', '')
+    previous = store.baseline(cluster_name, desc)
+    if previous and previous[0] == status and not is_changed(info, previous[1]):
+        state['unchanged'] = state.get('unchanged', 0) + 1
+        return
+
+    store.set_baseline(cluster_name, desc, status, info)
+    state['changed'] = state.get('changed', 0) + 1
+    to_print = [COLORS[status](f'[{status}]'), desc]
+    if not previous:
+        to_print.append('(new)')
+    elif previous[0] != status:
+        to_print.append(f'(was {previous[0]})')
+    to_print.append(', '.join([str(k) + ': ' + str(v) for k, v in _result[1].items()]))
+    print(' '.join(to_print), file=file)
+
+
+def render_stats(_stats, *_args, **_kwargs):
+    """
+    Render collected statistics.
+
+    :param _stats: A stats collector.
+    """
+    file = _kwargs.get('_file', sys.stdout)
+    state = _kwargs.get('_state', STATE)
+    print('', file=file)
+    print(f'changed checks: {state.get("changed", 0)}, unchanged checks: {state.get("unchanged", 0)}', file=file)
+    print(f'- {Color.green("succeeded")}: {_stats.succeeded}, {Color.yellow("no result")}: {_stats.no_result}, '
+          f'{Color.red("failed")}: {_stats.failed}, {Color.magenta("errors")}: {_stats.errors}, '
+          f'skipped: {_stats.skipped}', file=file)
+    state.clear()
@@ -1,8 +1,10 @@
 import datetime
-import re
+import sys
 
+from healthcheck.check_registry import get_meta
 
-preface = False
+# render state of calls without an own state
+STATE = {}
 
 
 def render_result(_result, _func, *_args, **_kwargs):
@@ -12,8 +14,9 @@ def render_result(_result, _func, *_args, **_kwargs):
     :param _result: The result.
     :param _func: The check function executed.
     """
-    global preface
-    if not preface:
+    file = _kwargs.get('_file', sys.stdout)
+    state = _kwargs.get('_state', STATE)
+    if not state.get('preface'):
         print(f'''<!DOCTYPE html PUBLIC "-//W3C//DTD HTML 4.0 Transitional//EN">
 <html><head><title>RE HealthCheck results for {_kwargs["_cluster_name"]}</title>
 <meta http-equiv="Content-Type" content="text/html; charset=utf-8">
@@ -29,54 +32,55 @@ img#logo {{ float: right; margin: 10px; width: 200px }}
 <h1>RE HealthCheck results for {_kwargs["_cluster_name"]}</h1>
 <p>{datetime.datetime.now().isoformat().replace('T', ' ').split('.')[0]}</p>
 <table style="width:100%">
-<tr><th>Code: Description</th><th>Result</th><th>Info</th></tr>''')
-        preface = True
+<tr><th>Code: Description</th><th>Result</th><th>Info</th></tr>''', file=file)
+        state['preface'] = True
 
-    doc = (_result[2] if len(_result) == 3 else _func.__doc__).split('\n')[0]
+    meta = get_meta(_func)
+    doc = _result[2] if len(_result) == 3 else meta.title
     remedy = None
-    print(f'<tr><td>{doc}</td>')
+    print(f'<tr><td>{doc}</td>', file=file)
     if _result[0] == '':
-        print('<td>SKIPPED</td>')
+        print('<td>SKIPPED</td>', file=file)
     elif _result[0] is True:
-        print('<td style="background-color:green">SUCCEDED</td>')
+        print('<td style="background-color:green">SUCCEDED</td>', file=file)
     elif _result[0] is False:
-        print('<td style="background-color:red">FAILED</td>')
-        doc = (_result[2] if len(_result) == 3 else _func.__doc__)
-        remedy = re.findall(r'Remedy: (.*)', doc, re.MULTILINE)
+        print('<td style="background-color:red">FAILED</td>', file=file)
+        remedy = meta.remedy
     elif _result[0] is None:
-        print('<td style="background-color:yellow">NO RESULT</td>')
+        print('<td style="background-color:yellow">NO RESULT</td>', file=file)
     elif _result[0] is Exception:
-        print('<td style="background-color:magenta">ERROR</td>')
+        print('<td style="background-color:magenta">ERROR</td>', file=file)
     else:
         raise NotImplementedError()
 
-    print('<td>')
-    print(', '.join([str(k) + ': ' + str(v) for k, v in _result[1].items()]))
+    print('<td>', file=file)
+    print(', '.join([str(k) + ': ' + str(v) for k, v in _result[1].items()]), file=file)
     if remedy:
-        print(f'&nbsp;<i><b>Remedy:</b> {remedy[0]}</i>')
-    print('</td></tr>')
+        print(f'&nbsp;<i><b>Remedy:</b> {remedy}</i>', file=file)
+    print('</td></tr>', file=file)
 
 
-def render_stats(_stats):
+def render_stats(_stats, *_args, **_kwargs):
     """
     Render collected statistics.
 
     :param _stats: A stats collector.
     """
-    print('</table>')
-    print('<table style="width:200px"><tr style="height:20px"><th></th></tr>')
-    print('<tr><td>')
+    file = _kwargs.get('_file', sys.stdout)
+    print('</table>', file=file)
+    print('<table style="width:200px"><tr style="height:20px"><th></th></tr>', file=file)
+    print('<tr><td>', file=file)
     print("Total checks run: {}".format(
-        sum([_stats.succeeded, _stats.no_result, _stats.failed, _stats.errors, _stats.skipped])))
-    print('</td></tr><tr><td style="background-color:green;text-align:right">')
-    print(f'succeeded:</td><td>{_stats.succeeded}')
-    print('</td></tr><tr><td style="background-color:yellow;text-align:right">')
-    print(f'no result:</td><td>{_stats.no_result}')
-    print('</td></tr><tr><td style="background-color:red;text-align:right">')
-    print(f'failed:</td><td>{_stats.failed}')
-    print('</td></tr><tr><td style="background-color:magenta;text-align:right">')
-    print(f'errors:</td><td>{_stats.errors}')
-    print('</td></tr><tr><td style="text-align:right">')
-    print(f'skipped:</td><td>{_stats.skipped}')
-    print('</td></tr>')
-    print('</table></body></html>')
+        sum([_stats.succeeded, _stats.no_result, _stats.failed, _stats.errors, _stats.skipped])), file=file)
+    print('</td></tr><tr><td style="background-color:green;text-align:right">', file=file)
+    print(f'succeeded:</td><td>{_stats.succeeded}', file=file)
+    print('</td></tr><tr><td style="background-color:yellow;text-align:right">', file=file)
+    print(f'no result:</td><td>{_stats.no_result}', file=file)
+    print('</td></tr><tr><td style="background-color:red;text-align:right">', file=file)
+    print(f'failed:</td><td>{_stats.failed}', file=file)
+    print('</td></tr><tr><td style="background-color:magenta;text-align:right">', file=file)
+    print(f'errors:</td><td>{_stats.errors}', file=file)
+    print('</td></tr><tr><td style="text-align:right">', file=file)
+    print(f'skipped:</td><td>{_stats.skipped}', file=file)
+    print('</td></tr>', file=file)
+    print('</table></body></html>', file=file)
@@ -1,5 +1,7 @@
 import json
-import re
+import sys
+
+from healthcheck.check_registry import get_meta
 
 
 def render_result(_result, _func, *_args, **_kwargs):
@@ -9,8 +11,10 @@ def render_result(_result, _func, *_args, **_kwargs):
     :param _result: The result.
     :param _func: The check function executed.
     """
+    file = _kwargs.get('_file', sys.stdout)
+    meta = get_meta(_func)
     to_print = {
-        'desc': (_result[2] if len(_result) == 3 else _func.__doc__).split('\n')[0]
+        'desc': _result[2] if len(_result) == 3 else meta.title
     }
     remedy = None
     if _result[0] == '':
@@ -19,8 +23,7 @@ def render_result(_result, _func, *_args, **_kwargs):
         to_print['status'] = 'SUCCEEDED'
     elif _result[0] is False:
         to_print['status'] = 'FAILED'
-        doc = (_result[2] if len(_result) == 3 else _func.__doc__)
-        remedy = re.findall(r'Remedy: (.*)', doc, re.MULTILINE)
+        remedy = meta.remedy
     elif _result[0] is None:
         to_print['status'] = 'NO RESULT'
     elif _result[0] is Exception:
@@ -29,17 +32,18 @@ def render_result(_result, _func, *_args, **_kwargs):
         raise NotImplementedError()
 
     if remedy:
-        to_print['remedy'] = remedy[0]
+        to_print['remedy'] = remedy
     to_print['info'] = _result[1]
-    print(json.dumps(to_print))
+    print(json.dumps(to_print), file=file)
 
 
-def render_stats(_stats):
+def render_stats(_stats, *_args, **_kwargs):
     """
     Render collected statistics.
 
     :param _stats: A stats collector.
     """
+    file = _kwargs.get('_file', sys.stdout)
     to_print = {
         'total checks run': sum([_stats.succeeded, _stats.no_result, _stats.failed, _stats.errors, _stats.skipped]),
         'succeeded': _stats.succeeded,
@@ -48,4 +52,4 @@ def render_stats(_stats):
         'errors': _stats.errors,
         'skipped': _stats.skipped
     }
-    print(json.dumps(to_print))
+    print(json.dumps(to_print), file=file)
@@ -0,0 +1,164 @@
+import math
+import re
+import sys
+
+from healthcheck.check_registry import get_meta
+
+# render state of calls without an own state
+STATE = {}
+
+STATUSES = {'': 'skipped', True: 'succeeded', False: 'failed', None: 'no result', Exception: 'error'}
+FAMILIES = {
+    'healthcheck_check_status': 'Status of a check result, 1 for the given status.',
+    'healthcheck_check_value': 'Numeric value of a check result.',
+    'healthcheck_checks': 'Amount of check results by status.',
+    'healthcheck_run_duration_seconds': 'Duration of the last run.',
+    'healthcheck_run_timestamp_seconds': 'End of the last run.'
+}
+# the quoted name of a database in descriptions, e.g. "DU-001: Check throughput of 'db1' (min/avg/max/dev)."
+DB_NAME = re.compile(r"'([^']*)'")
+
+
+def _escape(_value):
+    """
+    Escape a label value.
+
+    :param _value: The label value.
+    :return: The escaped label value.
+    """
+    return str(_value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format(_value):
+    """
+    Format a sample value, i.e. infinite values as '+Inf' or '-Inf' and not a number as 'NaN'.
+
+    :param _value: The numeric value.
+    :return: The formatted value.
+    """
+    value = float(_value)
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+
+    return repr(value)
+
+
+def _add(_samples, _family, _value, **_labels):
+    """
+    Add a sample.
+
+    :param _samples: The samples of the current run, grouped by metric family.
+    :param _family: The metric family name.
+    :param _value: The numeric value.
+    :param _labels: The labels.
+    """
+    labels = ','.join([f'{k}="{_escape(v)}"' for k, v in _labels.items()])
+    _samples.setdefault(_family, []).append(f'{_family}{{{labels}}} {_format(_value)}' if labels else
+                                            f'{_family} {_format(_value)}')
+
+
+def parse_value(_value, _fields=None):
+    """
+    Parse numeric values of an info value, e.g. '1.0/2.0/3.0/0.5 GB'.
+
+    :param _value: The info value.
+    :param _fields: An optional list of field names, e.g. ['min', 'avg', 'max', 'dev'].
+    :return: A tuple (list of (field, value), unit) or None if not numeric.
+    """
+    if type(_value) in (int, float, bool):
+        return [('value', float(_value))], ''
+    if not isinstance(_value, str):
+        return None
+
+    match = re.match(r'^\s*(-?\d+(?:\.\d+)?(?:/-?\d+(?:\.\d+)?)*)\s*([^\s(,]*)', _value)
+    if not match:
+        return None
+
+    values = list(map(float, match.group(1).split('/')))
+    if _fields and len(_fields) == len(values):
+        fields = _fields
+    elif len(values) == 1:
+        fields = ['value']
+    else:
+        fields = list(map(str, range(len(values))))
+
+    return list(zip(fields, values)), match.group(2)
+
+
+def _flatten(_info, _prefix=''):
+    """
+    Flatten nested info dicts.
+
+    :param _info: The info dict.
+    :param _prefix: The prefix of the keys.
+    :return: A generator of (key, value).
+    """
+    for key, value in _info.items():
+        key = f'{_prefix} {key}' if _prefix else str(key)
+        if isinstance(value, dict):
+            yield from _flatten(value, key)
+        else:
+            yield key, value
+
+
+def render_result(_result, _func, *_args, **_kwargs):
+    """
+    Render result, i.e. collect its samples until `render_stats` is called.
+
+    :param _result: The result.
+    :param _func: The check function executed.
+    """
+    samples = _kwargs.get('_state', STATE).setdefault('samples', {})
+    meta = get_meta(_func)
+    desc = _result[2] if len(_result) == 3 else meta.title
+    code = meta.code
+    # label results of the same check by database instead of their description, which has unbounded values
+    match = DB_NAME.search(desc)
+    db = match.group(1) if match else ''
+    cluster = _kwargs.get('_cluster_name', '')
+    if _result[0] not in STATUSES:
+        raise NotImplementedError()
+
+    _add(samples, 'healthcheck_check_status', 1, cluster=cluster, code=code, db=db, status=STATUSES[_result[0]])
+    if _result[0] is Exception:
+        return
+
+    # field names from the description, e.g. '(min/avg/max/dev)'
+    fields = re.findall(r'\(([\w/]+)\)\.?$', desc)
+    fields = fields[0].split('/') if fields else None
+    for item, value in _flatten(_result[1]):
+        parsed = parse_value(value, fields)
+        if not parsed:
+            continue
+        for field, number in parsed[0]:
+            _add(samples, 'healthcheck_check_value', number, cluster=cluster, code=code, db=db, item=item,
+                 field=field, unit=parsed[1])
+
+
+def render_stats(_stats, *_args, **_kwargs):
+    """
+    Render collected statistics and all samples of the run in OpenMetrics text format.
+
+    :param _stats: A stats collector.
+    """
+    file = _kwargs.get('_file', sys.stdout)
+    samples = _kwargs.get('_state', STATE).setdefault('samples', {})
+    for status, count in [('succeeded', _stats.succeeded), ('no result', _stats.no_result), ('failed', _stats.failed),
+                          ('error', _stats.errors), ('skipped', _stats.skipped)]:
+        _add(samples, 'healthcheck_checks', count, status=status)
+    if '_duration' in _kwargs:
+        _add(samples, 'healthcheck_run_duration_seconds', _kwargs['_duration'])
+    if '_timestamp' in _kwargs:
+        _add(samples, 'healthcheck_run_timestamp_seconds', _kwargs['_timestamp'])
+
+    for family, help_text in FAMILIES.items():
+        if family not in samples:
+            continue
+        print(f'# TYPE {family} gauge', file=file)
+        print(f'# HELP {family} {help_text}', file=file)
+        print('\n'.join(samples[family]), file=file)
+    print('# EOF', file=file)
+
+    samples.clear()
@@ -1,7 +1,9 @@
 import datetime
 import os
-import re
 import socket
+import sys
+
+from healthcheck.check_registry import get_meta
 
 
 def render_result(_result, _func, *_args, **_kwargs):
@@ -11,6 +13,7 @@ def render_result(_result, _func, *_args, **_kwargs):
     :param _result: The result.
     :param _func: The check function executed.
     """
+    file = _kwargs.get('_file', sys.stdout)
     pri = 8 * 1  # facility = 1, i.e. user-level messages
     ver = '1'
     ts = datetime.datetime.now().isoformat()
@@ -20,6 +23,7 @@ def render_result(_result, _func, *_args, **_kwargs):
     msg_id = '-'
     sd = '-'
 
+    meta = get_meta(_func)
     remedy = None
     if _result[0] == '':
         status = 'SKIPPED'
@@ -29,9 +33,8 @@ def render_result(_result, _func, *_args, **_kwargs):
         pri += 6  # severity = 6, i.e. Informational
     elif _result[0] is False:
         status = 'FAILED'
-        pri += 3  # severity = 3, i.e. Error
-        doc = (_result[2] if len(_result) == 3 else _func.__doc__)
-        remedy = re.findall(r'Remedy: (.*)', doc, re.MULTILINE)
+        pri += meta.severity  # severity = 3 or 4, i.e. Error or Warning
+        remedy = meta.remedy
     elif _result[0] is None:
         status = 'NO RESULT'
         pri += 6  # severity = 6, i.e. Informational
@@ -41,18 +44,19 @@ def render_result(_result, _func, *_args, **_kwargs):
     else:
         raise NotImplementedError()
 
-    msg = (_result[2] if len(_result) == 3 else _func.__doc__).split('\n')[0] + f' [{status}] ' + str(_result[1])
+    msg = (_result[2] if len(_result) == 3 else meta.title) + f' [{status}] ' + str(_result[1])
     if remedy:
-        msg += f' Remedy: {remedy[0]}'
-    print('<{}>{} {} {} {} {} {} {} {}'.format(pri, ver, ts, host, app, proc_id, msg_id, sd, msg))
+        msg += f' Remedy: {remedy}'
+    print('<{}>{} {} {} {} {} {} {} {}'.format(pri, ver, ts, host, app, proc_id, msg_id, sd, msg), file=file)
 
 
-def render_stats(_stats):
+def render_stats(_stats, *_args, **_kwargs):
     """
     Render collected statistics, tries to comply with https://tools.ietf.org/html/rfc5424.
 
     :param _stats: A stats collector.
     """
+    file = _kwargs.get('_file', sys.stdout)
     pri = 8 * 1  # facility = 1, i.e. user-level messages
     pri += 6  # severity = 6, i.e. Informational
     ver = '1'
@@ -71,4 +75,4 @@ def render_stats(_stats):
         'skipped': _stats.skipped
     }
 
-    print('<{}>{} {} {} {} {} {} {} {}'.format(pri, ver, ts, host, app, proc_id, msg_id, sd, msg))
+    print('<{}>{} {} {} {} {} {} {} {}'.format(pri, ver, ts, host, app, proc_id, msg_id, sd, msg), file=file)
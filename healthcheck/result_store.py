@@ -0,0 +1,143 @@
+import json
+import os
+import sqlite3
+import time
+
+STORE_PATH = '~/.healthcheck/results.db'
+# amount of results kept per check
+RETENTION = 100
+STATUSES = {'': 'SKIPPED', True: 'SUCCEEDED', False: 'FAILED', None: 'NO RESULT', Exception: 'ERROR'}
+
+
+class ResultStore(object):
+    """
+    Result Store class.
+
+    Persists the results of each run into a SQLite database, indexed by cluster, check code and timestamp.
+    Only the latest results of each check are kept, see `RETENTION`. Besides, a baseline per check is kept, i.e. the
+    result last reported as changed.
+    """
+    _instance = None
+
+    def __init__(self, _path=STORE_PATH, _retention=RETENTION):
+        """
+        :param _path: The path of the database file, defaults to '~/.healthcheck/results.db'.
+        :param _retention: The amount of results kept per check, defaults to 100.
+        """
+        self.path = os.path.expanduser(_path)
+        self.retention = _retention
+        self.conn = None
+        self.run = None
+
+    @classmethod
+    def inst(cls, _path=STORE_PATH, _retention=RETENTION):
+        """
+        Get singleton instance.
+
+        :param _path: The path of the database file, used on first call only.
+        :param _retention: The amount of results kept per check, used on first call only.
+        :return: The ResultStore singleton.
+        """
+        if not cls._instance:
+            cls._instance = ResultStore(_path, _retention)
+
+        return cls._instance
+
+    def enabled(self):
+        """
+        Check if the store was opened.
+
+        :return: Boolean
+        """
+        return self.conn is not None
+
+    def open(self):
+        """
+        Open the database file and create the schema if not existent.
+        """
+        os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS results (
+                run REAL, cluster TEXT, code TEXT, desc TEXT, status TEXT, info TEXT, duration REAL);
+            CREATE INDEX IF NOT EXISTS results_idx ON results (cluster, code, run);
+            CREATE TABLE IF NOT EXISTS baselines (
+                cluster TEXT, desc TEXT, status TEXT, info TEXT, PRIMARY KEY (cluster, desc));
+        ''')
+
+    def begin(self):
+        """
+        Begin a new run, results put afterwards are stamped with its timestamp.
+        Prunes results exceeding the retention, i.e. the table does not grow in watch mode.
+        """
+        self.run = time.time()
+        self.conn.execute('DELETE FROM results WHERE rowid IN (SELECT rowid FROM (SELECT rowid, ROW_NUMBER() OVER '
+                          '(PARTITION BY cluster, desc ORDER BY run DESC) AS n FROM results) WHERE n > ?)',
+                          (self.retention,))
+
+    def put(self, _cluster, _result, _desc, _duration=None):
+        """
+        Put a result of the current run.
+
+        :param _cluster: The cluster name.
+        :param _result: The result.
+        :param _desc: The first line of the description, e.g. "DU-002: Check memory usage of 'db1' (min/avg/max/dev).".
+        :param _duration: An optional duration of the check execution in seconds.
+        """
+        self.conn.execute('INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?)',
+                          (self.run, _cluster, _desc.split(':')[0], _desc, STATUSES[_result[0]],
+                           json.dumps(_result[1], sort_keys=True, default=str), _duration))
+
+    def previous(self, _cluster, _desc):
+        """
+        Get the latest result of a previous run.
+
+        :param _cluster: The cluster name.
+        :param _desc: The first line of the description.
+        :return: A tuple (status, info) or None if there is no previous result.
+        """
+        row = self.conn.execute('SELECT status, info FROM results WHERE cluster = ? AND code = ? AND desc = ? AND run < ? '
+                                'ORDER BY run DESC LIMIT 1',
+                                (_cluster, _desc.split(':')[0], _desc, self.run)).fetchone()
+
+        return (row[0], json.loads(row[1])) if row else None
+
+    def baseline(self, _cluster, _desc):
+        """
+        Get the baseline of a check, falls back to the latest result of a previous run.
+
+        :param _cluster: The cluster name.
+        :param _desc: The first line of the description.
+        :return: A tuple (status, info) or None if there is neither a baseline nor a previous result.
+        """
+        row = self.conn.execute('SELECT status, info FROM baselines WHERE cluster = ? AND desc = ?',
+                                (_cluster, _desc)).fetchone()
+
+        return (row[0], json.loads(row[1])) if row else self.previous(_cluster, _desc)
+
+    def set_baseline(self, _cluster, _desc, _status, _info):
+        """
+        Set the baseline of a check, e.g. to the result last reported as changed.
+
+        :param _cluster: The cluster name.
+        :param _desc: The first line of the description.
+        :param _status: The status, e.g. 'SUCCEEDED'.
+        :param _info: The info.
+        """
+        self.conn.execute('INSERT OR REPLACE INTO baselines VALUES (?, ?, ?, ?)',
+                          (_cluster, _desc, _status, json.dumps(_info, sort_keys=True, default=str)))
+
+    def commit(self):
+        """
+        Commit the results of the current run.
+        """
+        self.conn.commit()
+
+    def close(self):
+        """
+        Close the database file.
+        """
+        if self.conn is not None:
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
@@ -0,0 +1,109 @@
+import json
+import os
+import threading
+import time
+
+from contextlib import contextmanager
+
+
+class TraceRecorder(object):
+    """
+    Trace Recorder class.
+
+    Records spans of a run and writes them in Chrome Trace Event format,
+    see https://docs.google.com/document/d/1CvAClvFfyA5R-PhYUmn5OOQtYMH4h6I0nSsKchNAySU.
+    """
+    _instance = None
+
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self.threads = {}
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+        self.origin = time.perf_counter()
+
+    @classmethod
+    def inst(cls):
+        """
+        Get singleton instance.
+
+        :return: The TraceRecorder singleton.
+        """
+        if not cls._instance:
+            cls._instance = TraceRecorder()
+
+        return cls._instance
+
+    def enable(self):
+        """
+        Enable recording.
+        """
+        self.enabled = True
+
+    @contextmanager
+    def span(self, _name, _cat, **_args):
+        """
+        Record a span around the enclosed block.
+
+        :param _name: The name of the span, e.g. the check code.
+        :param _cat: The category of the span, e.g. 'check'.
+        :param _args: Optional arguments shown with the span, e.g. the target.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        ts = self._now()
+        try:
+            yield
+        finally:
+            self._add({'name': _name, 'cat': _cat, 'ph': 'X', 'ts': ts, 'dur': self._now() - ts, 'args': _args})
+
+    def instant(self, _name, _cat, **_args):
+        """
+        Record an instant event.
+
+        :param _name: The name of the event, e.g. 'cache hit'.
+        :param _cat: The category of the event.
+        :param _args: Optional arguments shown with the event.
+        """
+        if not self.enabled:
+            return
+
+        self._add({'name': _name, 'cat': _cat, 'ph': 'i', 's': 't', 'ts': self._now(), 'args': _args})
+
+    def dump(self, _path):
+        """
+        Write all recorded events into a file.
+
+        :param _path: The path of the trace file.
+        """
+        with self.lock:
+            meta = [{'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid, 'args': {'name': name}}
+                    for tid, name in self.threads.items()]
+            events = meta + self.events
+
+        with open(_path, 'w') as file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)
+
+    def _add(self, _event):
+        """
+        Add an event of the current thread.
+
+        :param _event: The event dict.
+        """
+        thread = threading.current_thread()
+        _event['pid'] = self.pid
+        _event['tid'] = thread.ident
+        with self.lock:
+            self.threads[thread.ident] = thread.name
+            self.events.append(_event)
+
+    def _now(self):
+        """
+        Get microseconds since creation.
+
+        :return: The timestamp in microseconds.
+        """
+        return (time.perf_counter() - self.origin) * 1000000
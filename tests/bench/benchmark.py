@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark `./hc` against synthetic clusters of growing size.
+
+Starts a local HTTPS stub of the REST-API and a fake RESP server for all database endpoints and runs `./hc` with the
+`local` remote executor, which returns canned command output with a configurable latency.
+Measures wall time, API request count, process spawns and peak RSS.
+
+Example: `python3 tests/bench/benchmark.py --sizes 3x10x20,5x50x200,9x200x1000 --intervals 60`
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from fake_resp import FakeRespServer
+from mock_cluster import MockApiServer, MockCluster, parse_size
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# runs `./hc` with an audit hook counting spawned processes
+BOOTSTRAP = '''
+import atexit, os, sys
+spawns = [0]
+def hook(event, args):
+    if event in ('subprocess.Popen', 'os.system', 'os.posix_spawn', 'os.exec', 'os.spawn'):
+        spawns[0] += 1
+sys.addaudithook(hook)
+atexit.register(lambda: open(os.environ['HC_BENCH_SPAWNS'], 'w').write(str(spawns[0])))
+sys.argv = ['hc'] + sys.argv[1:]
+from healthcheck.main import main
+main()
+'''
+
+
+def parse_args():
+    """
+    Parse command line arguments.
+
+    :return: The parsed command line arguments.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', help="CSV list of cluster sizes <NODES>x<DBS>x<SHARDS>.", type=str,
+                        default='3x10x20,5x50x200,9x200x1000')
+    parser.add_argument('--intervals', help="Amount of stats intervals.", type=int, default=60)
+    parser.add_argument('--latency', help="Latency of remote commands in seconds.", type=float, default=.01)
+    parser.add_argument('--resp-delay', help="Delay of the fake RESP server per command in seconds.", type=float,
+                        default=.0)
+    parser.add_argument('--repeat', help="Amount of runs per cluster size.", type=int, default=1)
+    parser.add_argument('--json', help="Output results in JSON format.", action='store_true')
+    parser.add_argument('hc_args', help="Additional arguments passed to `./hc`, e.g. `-- -s nodes`.", nargs='*')
+
+    return parser.parse_args()
+
+
+def run_hc(_tmp_dir, _api_addr, _cluster, _latency, _hc_args):
+    """
+    Run `./hc` once.
+
+    :param _tmp_dir: A temporary directory.
+    :param _api_addr: The address of the mock API server.
+    :param _cluster: The mock cluster.
+    :param _latency: The latency of remote commands.
+    :param _hc_args: Additional arguments.
+    :return: A tuple (wall time, process spawns, peak RSS in KB, return code).
+    """
+    rsps_path = os.path.join(_tmp_dir, 'responses.json')
+    with open(rsps_path, 'w') as file:
+        json.dump(_cluster.responses(), file)
+
+    config_path = os.path.join(_tmp_dir, 'bench.ini')
+    with open(config_path, 'w') as file:
+        file.write(f'[api]\naddr = {_api_addr}\nuser = bench\npass = bench\n\n'
+                   f'[local]\ntargets = {",".join(_cluster.targets())}\nresponses = {rsps_path}\n'
+                   f'latency = {_latency}\n\n[renderer]\nmodule = json\n')
+
+    spawns_path = os.path.join(_tmp_dir, 'spawns')
+    env = dict(os.environ, HC_BENCH_SPAWNS=spawns_path)
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, '-c', BOOTSTRAP, '--config', config_path] + _hc_args, cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    _, status, rusage = os.wait4(proc.pid, 0)
+    wall = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+
+    with open(spawns_path) as file:
+        spawns = int(file.read())
+
+    return wall, spawns, rusage.ru_maxrss, proc.returncode
+
+
+def main():
+    args = parse_args()
+    results = []
+    resp_server = FakeRespServer(_delay=args.resp_delay).start()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in args.sizes.split(','):
+            nodes, dbs, shards = parse_size(size.strip())
+            cluster = MockCluster(nodes, dbs, shards, args.intervals, resp_server.port)
+            server = MockApiServer(cluster, tmp_dir).start()
+            try:
+                for _ in range(args.repeat):
+                    server.requests = 0
+                    wall, spawns, rss, rc = run_hc(tmp_dir, server.addr, cluster, args.latency, args.hc_args)
+                    results.append({'nodes': nodes, 'dbs': dbs, 'shards': cluster.shards,
+                                    'intervals': args.intervals, 'wall_s': round(wall, 3),
+                                    'requests': server.requests, 'spawns': spawns, 'peak_rss_mb': round(rss / 1024, 1),
+                                    'rc': rc})
+            finally:
+                server.stop()
+    resp_server.stop()
+
+    if args.json:
+        print(json.dumps(results))
+        return
+
+    columns = ['nodes', 'dbs', 'shards', 'intervals', 'wall_s', 'requests', 'spawns', 'peak_rss_mb', 'rc']
+    print(' '.join(f'{c:>11}' for c in columns))
+    for result in results:
+        print(' '.join(f'{str(result[c]):>11}' for c in columns))
+
+
+if __name__ == '__main__':
+    main()
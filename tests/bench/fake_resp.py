@@ -0,0 +1,157 @@
+"""
+Fake RESP server.
+
+Answers PING, AUTH and a few other commands like a Redis database, with an optional delay per command.
+"""
+import socket
+import threading
+import time
+
+
+def encode(_value):
+    """
+    Encode a value as RESP2.
+
+    :param _value: A string, bytes, int, list, None or exception.
+    :return: The encoded bytes.
+    """
+    if _value is None:
+        return b'$-1\r\n'
+    if isinstance(_value, Exception):
+        return b'-' + str(_value).encode() + b'\r\n'
+    if isinstance(_value, int):
+        return b':' + str(_value).encode() + b'\r\n'
+    if isinstance(_value, list):
+        return b'*' + str(len(_value)).encode() + b'\r\n' + b''.join(map(encode, _value))
+    if isinstance(_value, str):
+        _value = _value.encode()
+
+    return b'$' + str(len(_value)).encode() + b'\r\n' + _value + b'\r\n'
+
+
+def parse_requests(_buffer):
+    """
+    Parse complete requests, inline or multibulk, from a buffer.
+
+    :param _buffer: A bytearray, parsed requests are removed.
+    :return: A list of requests, each a list of arguments.
+    """
+    requests = []
+    while _buffer:
+        if _buffer[:1] != b'*':
+            end = _buffer.find(b'\r\n')
+            if end < 0:
+                break
+            requests.append(bytes(_buffer[:end]).split())
+            del _buffer[:end + 2]
+            continue
+
+        pos = _buffer.find(b'\r\n')
+        if pos < 0:
+            break
+        count = int(_buffer[1:pos])
+        pos += 2
+        args = []
+        for _ in range(count):
+            end = _buffer.find(b'\r\n', pos)
+            if end < 0:
+                return requests
+            size = int(_buffer[pos + 1:end])
+            if len(_buffer) < end + 2 + size + 2:
+                return requests
+            args.append(bytes(_buffer[end + 2:end + 2 + size]))
+            pos = end + 2 + size + 2
+        requests.append(args)
+        del _buffer[:pos]
+
+    return requests
+
+
+class FakeRespServer(object):
+    """
+    Fake RESP Server class.
+    """
+
+    def __init__(self, _password=None, _delay=.0):
+        """
+        :param _password: An optional password, AUTH is required if given.
+        :param _delay: An optional delay per command in seconds.
+        """
+        self.password = _password
+        self.delay = _delay
+        self.commands = 0
+        self.lock = threading.Lock()
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen(128)
+        self.thread = threading.Thread(target=self._accept, daemon=True)
+
+    @property
+    def port(self):
+        return self.sock.getsockname()[1]
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.sock.close()
+
+    def handle(self, _args, _state):
+        """
+        Handle a command.
+
+        :param _args: The arguments of the command.
+        :param _state: A dict with the connection state.
+        :return: The RESP encoded response.
+        """
+        cmd = _args[0].upper() if _args else b''
+        if cmd == b'AUTH':
+            _state['authed'] = not self.password or _args[-1].decode() == self.password
+            return b'+OK\r\n' if _state['authed'] else b'-WRONGPASS invalid username-password pair\r\n'
+        if self.password and not _state.get('authed'):
+            return b'-NOAUTH Authentication required.\r\n'
+        if cmd == b'PING':
+            return b'+PONG\r\n'
+        if cmd == b'INFO':
+            return encode('# Memory\r\nused_memory:1024\r\nmem_fragmentation_ratio:1.10\r\n'
+                          '# Stats\r\nexpired_keys:0\r\nevicted_keys:0\r\n')
+        if cmd == b'SLOWLOG':
+            return encode([[1, int(time.time()), 15000, ['KEYS', '*'], '127.0.0.1:50000', '']])
+        if cmd == b'LATENCY':
+            return encode([['command', int(time.time()), 12, 25]])
+        if cmd == b'HELLO':
+            return encode(Exception('ERR unknown command `HELLO`'))
+
+        return encode(Exception(f'ERR unknown command `{cmd.decode(errors="replace")}`'))
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, _conn):
+        state = {}
+        buffer = bytearray()
+        with _conn:
+            while True:
+                try:
+                    data = _conn.recv(65536)
+                except OSError:
+                    return
+                if not data:
+                    return
+                buffer.extend(data)
+                rsps = []
+                for args in parse_requests(buffer):
+                    if self.delay:
+                        time.sleep(self.delay)
+                    rsps.append(self.handle(args, state))
+                with self.lock:
+                    self.commands += len(rsps)
+                if rsps:
+                    _conn.sendall(b''.join(rsps))
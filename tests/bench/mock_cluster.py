@@ -0,0 +1,341 @@
+"""
+Synthetic Redis Enterprise cluster.
+
+Generates REST-API topics and canned remote command responses for a cluster of configurable size
+and serves the topics by a local HTTPS stub.
+"""
+import base64
+import datetime
+import json
+import math
+import os
+import random
+import re
+import ssl
+import subprocess
+import threading
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+GB = pow(1024, 3)
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'healthcheck',
+                           'remote_scripts')
+
+
+def gen_intervals(_count, _metrics, _seed=0):
+    """
+    Generate stats intervals.
+
+    :param _count: The amount of intervals.
+    :param _metrics: A dict mapping metric names to (base, amplitude).
+    :param _seed: A random seed.
+    :return: A list of interval dicts.
+    """
+    rnd = random.Random(_seed)
+    start = datetime.datetime(2020, 1, 1)
+    intervals = []
+    for i in range(_count):
+        interval = {'interval': '1min',
+                    'stime': (start + datetime.timedelta(minutes=i)).isoformat() + 'Z',
+                    'etime': (start + datetime.timedelta(minutes=i + 1)).isoformat() + 'Z'}
+        for name, (base, amplitude) in _metrics.items():
+            interval[name] = base + amplitude * math.sin(i / 10) * rnd.random()
+        intervals.append(interval)
+
+    return intervals
+
+
+SHARD_INFO = '''# Memory
+used_memory:1073741824
+mem_fragmentation_ratio:1.12
+# Stats
+expired_keys:100
+evicted_keys:0
+# Commandstats
+cmdstat_get:calls=1000,usec=2000,usec_per_call=2.00
+cmdstat_set:calls=500,usec=1500,usec_per_call=3.00
+cmdstat_keys:calls=1,usec=15000,usec_per_call=15000.00'''
+
+
+def remote_python_pattern(_name):
+    """
+    Get a regular expression matching the command of a remote script, see `to_remote_python`.
+
+    :param _name: The name of the script.
+    :return: The regular expression.
+    """
+    with open(os.path.join(SCRIPTS_DIR, f'{_name}.py'), 'rb') as file:
+        return re.escape(base64.b64encode(file.read()).decode())
+
+
+def gen_slowlog(_uid, _count=5):
+    """
+    Generate the formatted output of SLOWLOG GET, i.e. of `redis-cli --no-raw`.
+
+    :param _uid: The shard UID, used as seed.
+    :param _count: The amount of entries.
+    :return: The output.
+    """
+    rnd = random.Random(_uid)
+    lines = []
+    for i, entry_id in enumerate(range(_count, 0, -1), 1):
+        prefix = f'{i:>{len(str(_count))}}) '
+        args = rnd.choice([['KEYS', '*'], ['HGETALL', 'h:1'], ['ZRANGE', 'z', '0', '1600000000']])
+        lines += [f'{prefix}1) (integer) {entry_id}',
+                  ' ' * len(prefix) + f'2) (integer) {1600000000 + entry_id}',
+                  ' ' * len(prefix) + f'3) (integer) {rnd.randint(10000, 200000)}']
+        lines += [' ' * len(prefix) + ('4) ' if j == 1 else '   ') + f'{j}) "{arg}"' for j, arg in enumerate(args, 1)]
+        lines += [' ' * len(prefix) + '5) "10.0.0.1:50000"', ' ' * len(prefix) + '6) ""']
+
+    return '\n'.join(lines)
+
+
+class MockCluster(object):
+    """
+    Mock Cluster class.
+    """
+
+    def __init__(self, _nodes, _dbs, _shards, _intervals, _resp_port=None):
+        """
+        :param _nodes: The amount of nodes.
+        :param _dbs: The amount of databases.
+        :param _shards: The amount of shards, distributed across databases and nodes.
+        :param _intervals: The amount of stats intervals.
+        :param _resp_port: An optional port of a local RESP server all endpoints point to.
+        """
+        self.nodes = _nodes
+        self.dbs = _dbs
+        self.shards = max(_shards, _dbs)
+        self.intervals = _intervals
+        self.resp_port = _resp_port
+        self.topics = {}
+        self._generate()
+
+    def targets(self):
+        """
+        Get the names of the remote targets.
+
+        :return: A list of target names.
+        """
+        return [f'node{i}' for i in range(1, self.nodes + 1)]
+
+    def responses(self):
+        """
+        Get canned remote command responses, see `RemoteExecutor._respond`.
+
+        :return: A dict mapping targets to dicts of regular expressions and responses.
+        """
+        node_lines = '\n'.join([f'{"*" if i == 1 else ""}node:{i} {"master" if i == 1 else "slave"} '
+                                f'10.0.0.{i} 192.168.0.{i} node{i} 0/100 4 RE OK' for i in range(1, self.nodes + 1)])
+        rsps = {'*': {
+            r'^sudo pwd$': '/root',
+            r'rladmin status \|': node_lines,
+            r'rladmin status$': 'CLUSTER NODES:\n' + node_lines,
+            r'rladmin info node': 'node id: 1\n    quorum only: disabled\n',
+            r'^sudo df ': 'Filesystem 1K-blocks Used Available Use% Mounted on\n/dev/sdb 100 10 90 10% /var/opt',
+            r'rlcheck': 'check 1 PASSED\ncheck 2 PASSED',
+            r'/proc/swaps': '1',
+            r'transparent_hugepage': 'always madvise [never]',
+            r'os-release': 'PRETTY_NAME="Ubuntu 18.04.5 LTS"',
+            r'^grep error ': '',
+            r'^ping -c': '4 packets transmitted, 4 received\nrtt min/avg/max/mdev = 0.100/0.200/0.300/0.050 ms',
+            r'^python -c': '',
+            r'overcommit_memory': '1',
+            r'cnm_ctl status': 'cnm_exec RUNNING\ncnm_http RUNNING',
+            r'supervisorctl status': 'redis_mgr RUNNING\nrlec_supervisor STOPPED',
+            r'shard-cli \d+ PING': 'PONG',
+            remote_python_pattern('node_sampler'): json.dumps({
+                'busy': [420, 510, 380, 450], 'iowait': [10, 20, 5, 0], 'steal': [0, 15, 0, 5],
+                'mem_avail': [40960, 40950, 40940, 40960], 'psi': {'cpu': [20, 35, 10, 5], 'io': [0, 5, 0, 0]},
+                'procs': [['redis-server:1001', 650], ['dmcproxy:900', 210]], 'cpus': 8}),
+            remote_python_pattern('bandwidth_probe') + r'.* - listen ': json.dumps({'listening': True}),
+            remote_python_pattern('bandwidth_probe') + r'.* - send ': json.dumps({'sent': 1180.5}),
+            remote_python_pattern('storage_probe'): json.dumps({
+                path: {'write_mbps': 850.2, 'read_iops': 21500.0, 'fsync_p99_ms': .41, 'fsyncs': 4200, 'direct': True}
+                for path in ['/var/opt/redislabs/tmp', '/var/opt/redislabs/persist']}),
+            remote_python_pattern('log_scan'): json.dumps({
+                '/var/opt/redislabs/log/cnm_exec.log': {'inode': 1, 'offset': 1000, 'skipped': 0, 'matches': [],
+                                                        'counts': {r'\berror\b': 0, r'\bfatal\b': 0}}}),
+        }}
+        for i, target in enumerate(self.targets(), 1):
+            # batched `shard-cli` commands of the node's shards, see `Databases._exec_shard_cli`
+            uids = range(i, self.shards + 1, self.nodes)
+            rsps[target] = {
+                r'^hostname -I$': f'10.0.0.{i} 192.168.0.{i}',
+                r'shard-cli \d+ INFO all': '\n'.join([f'==shard:{uid}:INFO all==\n{SHARD_INFO}' for uid in uids]),
+                r'shard-cli \d+ --no-raw SLOWLOG GET': '\n'.join([
+                    f'==shard:{uid}:--no-raw SLOWLOG GET 128==\n{gen_slowlog(uid)}\n==shard:{uid}:LATENCY LATEST==\n'
+                    f'command\n1600000000\n{uid}\n{uid * 5}' for uid in uids])}
+
+        return rsps
+
+    def get(self, _path):
+        """
+        Get a topic.
+
+        :param _path: The path of the topic, e.g. '/v1/nodes'.
+        :return: The topic or None if not found.
+        """
+        return self.topics.get(_path.split('?')[0].rstrip('/'))
+
+    def _generate(self):
+        """
+        Generate all topics.
+        """
+        nodes = []
+        nodes_stats = []
+        for uid in range(1, self.nodes + 1):
+            node = {'uid': uid, 'addr': f'10.0.0.{uid}', 'cores': 8, 'total_memory': 64 * GB,
+                    'ephemeral_storage_size': 256 * GB, 'persistent_storage_size': 512 * GB,
+                    'ephemeral_storage_path': '/var/opt/redislabs/tmp',
+                    'persistent_storage_path': '/var/opt/redislabs/persist', 'software_version': '6.0.8-28',
+                    'status': 'active'}
+            nodes.append(node)
+            self.topics[f'/v1/nodes/{uid}'] = node
+            nodes_stats.append({'uid': uid, 'intervals': gen_intervals(self.intervals, {
+                'cpu_idle': (.7, .2), 'free_memory': (40 * GB, 8 * GB), 'ephemeral_storage_avail': (200 * GB, GB),
+                'persistent_storage_avail': (400 * GB, GB), 'ingress_bytes': (GB, GB / 2),
+                'egress_bytes': (GB, GB / 2)}, uid)})
+
+        shards = []
+        bdbs = []
+        bdbs_alerts = {}
+        shards_per_db = self.shards // self.dbs
+        shard_uid = 1
+        for uid in range(1, self.dbs + 1):
+            count = shards_per_db + (1 if uid <= self.shards % self.dbs else 0)
+            shard_list = []
+            for i in range(count):
+                role = 'master' if i % 2 == 0 or count == 1 else 'slave'
+                shard = {'uid': str(shard_uid), 'bdb_uid': uid, 'node_uid': str((shard_uid - 1) % self.nodes + 1),
+                         'role': role, 'status': 'active', 'detailed_status': 'ok'}
+                shards.append(shard)
+                shard_list.append(shard_uid)
+                self.topics[f'/v1/shards/stats/{shard_uid}'] = {
+                    'uid': str(shard_uid), 'role': role, 'intervals': gen_intervals(self.intervals, {
+                        'total_req': (5000, 2000), 'used_memory': (GB, GB / 4)}, shard_uid)}
+                shard_uid += 1
+
+            port = self.resp_port or 12000 + uid
+            bdbs.append({'uid': uid, 'name': f'db{uid}', 'memory_size': 4 * GB, 'shards_count': max(count // 2, 1),
+                         'replication': count > 1, 'oss_cluster': False, 'crdt': False, 'crdt_sync': 'disabled',
+                         'crdt_sources': [], 'replica_sync': 'disabled', 'replica_sources': [], 'bigstore': False,
+                         'shards_placement': 'dense', 'proxy_policy': 'single', 'module_list': [],
+                         'data_persistence': 'disabled', 'rack_aware': False, 'shard_list': shard_list,
+                         'authentication_redis_pass': '',
+                         'endpoints': [{'addr_type': 'external', 'addr': ['127.0.0.1'], 'port': port,
+                                        'dns_name': f'redis-{port}.db{uid}.cluster.local'}]})
+            bdbs_alerts[str(uid)] = {'bdb_size': {'state': False}}
+            self.topics[f'/v1/bdbs/stats/{uid}'] = {'uid': uid, 'intervals': gen_intervals(self.intervals, {
+                'total_req': (10000, 4000), 'used_memory': (2 * GB, GB / 2), 'ingress_bytes': (GB, GB / 2),
+                'egress_bytes': (GB, GB / 2)}, uid)}
+
+        self.topics.update({
+            '/v1/cluster': {'name': 'cluster.local', 'min_control_TLS_version': '1.2', 'min_data_TLS_version': '1.2'},
+            '/v1/cluster/check': {'cluster_test_result': True, 'nodes': []},
+            '/v1/cluster/alerts': {'cluster_certs_about_to_expire': {'state': False}},
+            '/v1/cluster/stats': {'intervals': gen_intervals(self.intervals, {
+                'total_req': (10000 * self.dbs, 4000), 'free_memory': (40 * GB * self.nodes, 8 * GB),
+                'ephemeral_storage_avail': (200 * GB * self.nodes, GB),
+                'persistent_storage_avail': (400 * GB * self.nodes, GB), 'ingress_bytes': (GB, GB / 2),
+                'egress_bytes': (GB, GB / 2)})},
+            '/v1/license': {'expired': False, 'shards_limit': 10 * len(shards), 'expiration_date': '2030-01-01T00:00:00Z'},
+            '/v1/nodes': nodes,
+            '/v1/nodes/stats': nodes_stats,
+            '/v1/nodes/alerts': {str(node['uid']): {'node_memory': {'state': False}} for node in nodes},
+            '/v1/bdbs': bdbs,
+            '/v1/bdbs/alerts': bdbs_alerts,
+            '/v1/shards': shards,
+            '/v1/shards/stats': [self.topics[f'/v1/shards/stats/{shard["uid"]}'] for shard in shards],
+        })
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class MockApiServer(object):
+    """
+    Mock API Server class.
+
+    Serves the topics of a mock cluster by HTTPS and counts the requests.
+    """
+
+    def __init__(self, _cluster, _cert_dir):
+        """
+        :param _cluster: A mock cluster.
+        :param _cert_dir: A directory for the self-signed certificate.
+        """
+        self.cluster = _cluster
+        self.requests = 0
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server.lock:
+                    server.requests += 1
+                topic = server.cluster.get(self.path)
+                body = json.dumps(topic).encode() if topic is not None else b'{"error_code": "not_found"}'
+                self.send_response(200 if topic is not None else 404)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *_args):
+                pass
+
+        self.httpd = _ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(*gen_cert(_cert_dir))
+        self.httpd.socket = context.wrap_socket(self.httpd.socket, server_side=True)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def addr(self):
+        """
+        Get the address of the server.
+
+        :return: The address, i.e. 'host:port'.
+        """
+        return '{}:{}'.format(*self.httpd.server_address)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def gen_cert(_dir):
+    """
+    Generate a self-signed certificate with `openssl`.
+
+    :param _dir: The directory to write into.
+    :return: A tuple (certificate file, key file).
+    """
+    cert, key = os.path.join(_dir, 'cert.pem'), os.path.join(_dir, 'key.pem')
+    if not os.path.exists(cert):
+        subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-subj', '/CN=localhost',
+                        '-days', '1', '-keyout', key, '-out', cert], check=True, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL)
+
+    return cert, key
+
+
+def parse_size(_size):
+    """
+    Parse a cluster size, e.g. '3x10x30' for 3 nodes, 10 databases and 30 shards.
+
+    :param _size: The size string.
+    :return: A tuple (nodes, databases, shards).
+    """
+    match = re.match(r'^(\d+)x(\d+)x(\d+)$', _size)
+    if not match:
+        raise ValueError(f"invalid cluster size '{_size}', expected <NODES>x<DBS>x<SHARDS>")
+
+    return tuple(map(int, match.groups()))
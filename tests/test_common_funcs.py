@@ -0,0 +1,58 @@
+import unittest
+
+from healthcheck.common_funcs import parse_slowlog
+
+SLOWLOG = '''\
+ 1) 1) (integer) 11
+    2) (integer) 1600000011
+    3) (integer) 15000
+    4) 1) "ZRANGEBYSCORE"
+       2) "z"
+       3) (integer) 1600000000
+       4) "1600000010"
+    5) "10.0.0.1:50000"
+    6) ""
+ 2) 1) (integer) 10
+    2) (integer) 1600000010
+    3) (integer) 20000
+    4)  1) "del"
+        2) "k1"
+        3) "k2"
+        4) "k3"
+        5) "k4"
+        6) "k5"
+        7) "k6"
+        8) "k7"
+        9) "k8"
+       10) "k9"
+    5) "10.0.0.2:50000"
+    6) "worker"
+'''
+
+
+class ParseSlowlogTest(unittest.TestCase):
+    """
+    Tests of `parse_slowlog`.
+    """
+
+    def test_entries(self):
+        self.assertEqual(list(parse_slowlog(SLOWLOG)), [(11, 1600000011, 15000, 'ZRANGEBYSCORE'),
+                                                        (10, 1600000010, 20000, 'DEL')])
+
+    def test_legacy_entries(self):
+        output = '1) 1) (integer) 3\n   2) (integer) 1309448221\n   3) (integer) 15\n   4) 1) "ping"'
+        self.assertEqual(list(parse_slowlog(output)), [(3, 1309448221, 15, 'PING')])
+
+    def test_empty(self):
+        self.assertEqual(list(parse_slowlog('')), [])
+        self.assertEqual(list(parse_slowlog('(empty array)')), [])
+        self.assertEqual(list(parse_slowlog('(empty list or set)')), [])
+
+    def test_incomplete_entries(self):
+        self.assertEqual(list(parse_slowlog(SLOWLOG[:SLOWLOG.index(' 2) 1)')] + ' 2) 1) (integer) 10\n')),
+                         [(11, 1600000011, 15000, 'ZRANGEBYSCORE')])
+        self.assertEqual(list(parse_slowlog('ERR unknown command\n1600000000\n15')), [])
+
+
+if __name__ == '__main__':
+    unittest.main()